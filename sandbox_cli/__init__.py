@@ -1,27 +1,102 @@
 #!/usr/bin/env python3
 """Docker Sandbox CLI - Manage sandboxed Claude Code environments with git worktrees."""
 
+import atexit
 import fcntl
-import json
+import functools
 import os
 import subprocess
 import sys
+from collections.abc import Callable
 from contextlib import contextmanager
 from pathlib import Path
 
 import click
 
 
-def run(cmd: list[str], capture: bool = True, check: bool = False) -> subprocess.CompletedProcess:
-    """Run a command and return the result."""
+def run(cmd: list[str], capture: bool = True, check: bool = False, text: bool = True) -> subprocess.CompletedProcess:
+    """Run a command and return the result (stdout/stderr as bytes if text=False).
+
+    With capture=False the command's output is shown on stderr, keeping stdout
+    for results other tools parse (e.g. `start --task` JSON).
+    """
+    if not capture:
+        # fd 2 rather than sys.stderr, which may be a wrapper without a fileno
+        return subprocess.run(cmd, stdout=2, text=text, check=check)
     return subprocess.run(
         cmd,
-        capture_output=capture,
-        text=True,
+        capture_output=True,
+        text=text,
         check=check,
     )
 
 
+def run_check(cmd: list[str]) -> bool:
+    """Run a command for its exit status only (no pipes, nothing decoded)."""
+    return subprocess.call(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL) == 0
+
+
+# Long-lived `git cat-file --batch-check` processes, keyed by working directory
+_ref_checkers: dict[str, subprocess.Popen] = {}
+
+
+# Characters git never allows in a ref name (see git-check-ref-format)
+_REF_BAD_CHARS = frozenset(" ~^:?*[\\\x7f") | {chr(c) for c in range(32)}
+
+
+def is_ref_name(ref: str) -> bool:
+    """Check that ref is a well-formed fully-qualified ref name (git check-ref-format rules)."""
+    if not ref.startswith("refs/") or ref.endswith(("/", ".")) or ".." in ref or "@{" in ref:
+        return False
+    if not _REF_BAD_CHARS.isdisjoint(ref):
+        return False
+    return all(part and not part.startswith(".") and not part.endswith(".lock") for part in ref.split("/"))
+
+
+def ref_exists(ref: str) -> bool:
+    """Check if a fully-qualified ref exists.
+
+    Lookups go through one persistent `git cat-file --batch-check` process per
+    working directory, so repeated checks cost a pipe round trip rather than a
+    git fork+exec each. cat-file resolves any revision expression (main~1,
+    main:path), so anything that isn't a plain ref name is rejected first.
+    """
+    if not is_ref_name(ref):
+        return False
+    cwd = os.getcwd()
+    proc = _ref_checkers.get(cwd)
+    if proc is None or proc.poll() is not None:
+        proc = subprocess.Popen(
+            ["git", "cat-file", "--batch-check"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+        _ref_checkers[cwd] = proc
+    try:
+        proc.stdin.write(f"{ref}\n")
+        proc.stdin.flush()
+        line = proc.stdout.readline()
+    except OSError:
+        # Not a git repository: cat-file exited before reading the query
+        return False
+    # "<sha> <type> <size>" when found, "<ref> missing" otherwise
+    return bool(line) and not line.rstrip("\n").endswith(" missing")
+
+
+@atexit.register
+def _close_ref_checkers() -> None:
+    """Shut down the persistent ref lookup processes."""
+    for proc in _ref_checkers.values():
+        try:
+            proc.stdin.close()
+        except OSError:
+            pass
+        proc.wait()
+    _ref_checkers.clear()
+
+
 @contextmanager
 def build_lock(lock_path: Path):
     """Acquire an exclusive file lock for image builds."""
@@ -87,6 +162,8 @@ def extract_response(log_path: Path) -> str | None:
 
     Finds the last 'type: result' object, falls back to last assistant message text.
     """
+    import json
+
     last_result = None
     last_assistant = None
     for line in log_path.read_text().splitlines():
@@ -120,6 +197,8 @@ def extract_codex_response(worktree_path: Path, log_path: Path) -> str | None:
     Finds the last agent_message item text from item.completed events.
     worktree_path is accepted for interface consistency but not used.
     """
+    import json
+
     if not log_path.exists():
         return None
 
@@ -149,6 +228,8 @@ def extract_gemini_response(worktree_path: Path, log_path: Path) -> str | None:
 
     worktree_path is accepted for interface consistency but not used.
     """
+    import json
+
     if not log_path.exists():
         return None
 
@@ -185,9 +266,7 @@ def parse_diff_stats(numstat: str) -> dict:
     files = 0
     insertions = 0
     deletions = 0
-    for line in numstat.strip().splitlines():
-        if not line:
-            continue
+    for line in numstat.splitlines():
         parts = line.split("\t")
         if len(parts) < 3:
             continue
@@ -199,22 +278,60 @@ def parse_diff_stats(numstat: str) -> dict:
     return {"filesChanged": files, "insertions": insertions, "deletions": deletions}
 
 
+def _git_locations() -> tuple[Path, Path] | None:
+    """Return (main repo root, main .git dir) for the current directory."""
+    return _git_locations_at(os.getcwd())
+
+
+@functools.lru_cache(maxsize=None)
+def _git_locations_at(cwd: str) -> tuple[Path, Path] | None:
+    """Single rev-parse call behind _git_locations(), memoized per directory."""
+    result = run(["git", "rev-parse", "--show-toplevel", "--git-common-dir"])
+    if result.returncode != 0:
+        return None
+    lines = result.stdout.splitlines()
+    if len(lines) < 2:
+        return None
+    toplevel, common = lines[0], lines[1]
+    if common == ".git":
+        return Path(toplevel), Path(toplevel) / ".git"
+    # Inside a worktree this is an absolute path like /Users/test/myrepo/.git;
+    # from a subdirectory it is relative to the cwd (e.g. ../../.git)
+    main_git = Path(os.path.normpath(os.path.join(cwd, common)))
+    return main_git.parent, main_git
+
+
 def get_repo_root() -> Path | None:
     """Get the main git repository root directory (resolves through worktrees)."""
-    result = run(["git", "rev-parse", "--show-toplevel"])
-    if result.returncode != 0:
+    locations = _git_locations()
+    if locations is None:
+        return None
+    return locations[0]
+
+
+def resolve_context(name: str, fetch: bool = False) -> dict | None:
+    """Resolve repo root, main .git dir and which branch refs exist for `name`.
+
+    Remote refs are read as of the last fetch; pass fetch=True to refresh them
+    first (only needed when there is no local branch). Returns None when not
+    inside a git repository.
+    """
+    locations = _git_locations()
+    if locations is None:
         return None
-    toplevel = Path(result.stdout.strip())
-    # If we're inside a worktree, resolve to the main repo root
-    git_common = run(["git", "rev-parse", "--git-common-dir"])
-    if git_common.returncode == 0:
-        common = git_common.stdout.strip()
-        if common != ".git":
-            # common is an absolute path like /Users/test/myrepo/.git
-            return Path(common).parent
-    return toplevel
+    repo_root, main_git = locations
+    has_local = branch_exists(name)
+    if fetch and not has_local:
+        fetch_if_stale(main_git)
+    return {
+        "repo_root": repo_root,
+        "main_git": main_git,
+        "has_local": has_local,
+        "has_remote": not has_local and remote_branch_exists(name),
+    }
 
 
+@functools.lru_cache(maxsize=None)
 def get_main_git_dir(repo_root: Path) -> Path:
     """Get the main .git directory (handles worktrees)."""
     result = run(["git", "-C", str(repo_root), "rev-parse", "--git-common-dir"])
@@ -224,6 +341,7 @@ def get_main_git_dir(repo_root: Path) -> Path:
     return Path(git_dir)
 
 
+@functools.lru_cache(maxsize=None)
 def safe_name(branch: str) -> str:
     """Convert branch name to safe sandbox name (replace / with -)."""
     return branch.replace("/", "-")
@@ -241,48 +359,97 @@ def get_worktree_path(repo_root: Path, name: str) -> Path:
 
 
 def docker_container_ls(prefix: str = "sandbox-") -> list[dict]:
-    """List all sandbox containers."""
-    result = run(["docker", "ps", "-a", "--filter", f"name={prefix}", "--format", "{{.ID}}\t{{.Names}}\t{{.Status}}"])
+    """List sandbox containers whose name starts with prefix."""
+    import re
+    # docker matches the name filter as a regex anywhere in the name; anchor it
+    # (older daemons include the leading "/") so the daemon returns exact matches
+    result = run(["docker", "ps", "-a", "--filter", f"name=^/?{re.escape(prefix)}",
+                  "--format", "{{.ID}}\t{{.Names}}\t{{.Status}}"],
+                 text=False)
     if result.returncode != 0:
         return []
 
     containers = []
-    for line in result.stdout.strip().split("\n"):
-        if not line:
+    for line in result.stdout.splitlines():
+        container_id, _, rest = line.partition(b"\t")
+        name, sep, status = rest.partition(b"\t")
+        if not sep:
             continue
-        parts = line.split("\t")
-        if len(parts) >= 3:
-            containers.append({
-                "id": parts[0],
-                "name": parts[1],
-                "status": parts[2],
-            })
+        containers.append({
+            "id": container_id.decode(),
+            "name": name.decode(),
+            "status": status.decode(errors="replace"),
+        })
     return containers
 
 
+# Container status to show after a `docker events` action (destroy removes the entry)
+_EVENT_STATUS = {
+    "create": "Created",
+    "start": "Up",
+    "restart": "Up",
+    "unpause": "Up",
+    "pause": "Up (Paused)",
+    "die": "Exited",
+}
+
+
+def apply_container_event(containers: list[dict], action: str, name: str, container_id: str = "") -> bool:
+    """Apply a docker container event to a docker_container_ls() result in place.
+
+    Returns True if the list changed.
+    """
+    for i, c in enumerate(containers):
+        if c["name"] == name:
+            if action == "destroy":
+                del containers[i]
+                return True
+            status = _EVENT_STATUS.get(action)
+            if status is None or status == c["status"]:
+                return False
+            c["status"] = status
+            return True
+    if action == "create":
+        containers.append({"id": container_id[:12], "name": name, "status": _EVENT_STATUS["create"]})
+        return True
+    return False
+
+
 def docker_container_rm(name: str) -> bool:
     """Remove a docker container by name."""
-    result = run(["docker", "rm", "-f", name])
-    return result.returncode == 0
+    return run_check(["docker", "rm", "-f", name])
+
+
+def docker_containers_rm(names: list[str]) -> set[str]:
+    """Remove several docker containers in one call. Returns the names removed."""
+    if not names:
+        return set()
+    result = run(["docker", "rm", "-f", *names])
+    # docker prints each removed container as it was named on the command line
+    return set(result.stdout.split()) & set(names)
+
+
+# `git worktree list --porcelain` line keys we keep, and the dict field each maps to
+_WORKTREE_FIELDS = {b"worktree": "path", b"branch": "branch", b"HEAD": "head"}
 
 
 def git_worktree_list() -> list[dict]:
     """List all git worktrees."""
-    result = run(["git", "worktree", "list", "--porcelain"])
+    result = run(["git", "worktree", "list", "--porcelain"], text=False)
     if result.returncode != 0:
         return []
 
     worktrees = []
     current = {}
-    for line in result.stdout.strip().split("\n"):
-        if line.startswith("worktree "):
+    for line in result.stdout.splitlines():
+        key, _, value = line.partition(b" ")
+        field = _WORKTREE_FIELDS.get(key)
+        if field == "path":
             if current:
                 worktrees.append(current)
-            current = {"path": line[9:]}
-        elif line.startswith("branch "):
-            current["branch"] = line[7:]
-        elif line.startswith("HEAD "):
-            current["head"] = line[5:]
+            current = {"path": os.fsdecode(value)}
+        elif field:
+            current[field] = value.decode()
     if current:
         worktrees.append(current)
 
@@ -301,23 +468,25 @@ def git_worktree_add(path: Path, branch: str, new_branch: bool = False) -> bool:
     return result.returncode == 0
 
 
-def git_worktree_remove(path: Path, force: bool = False) -> bool:
+def git_worktree_remove(path: str | Path, force: bool = False) -> bool:
     """Remove a git worktree."""
-    cmd = ["git", "worktree", "remove", str(path)]
+    cmd = ["git", "worktree", "remove", os.fspath(path)]
     if force:
         cmd.append("--force")
-    result = run(cmd)
-    return result.returncode == 0
+    return run_check(cmd)
 
 
 def copy_env_files(src: Path, dest: Path) -> list[str]:
     """Copy .env* files from src to dest directory."""
     import shutil
     copied = []
-    for env_file in src.glob(".env*"):
-        if env_file.is_file():
-            shutil.copy2(env_file, dest / env_file.name)
-            copied.append(env_file.name)
+    # scandir's entry types avoid a stat per entry (only symlinks are followed)
+    with os.scandir(src) as entries:
+        for entry in entries:
+            if entry.name.startswith(".env") and entry.is_file():
+                # Content and permission bits only; timestamps don't matter here
+                shutil.copy(entry.path, dest / entry.name)
+                copied.append(entry.name)
     return copied
 
 
@@ -331,8 +500,9 @@ def _build_lock_path() -> Path:
     return Path.home() / ".config" / "sandbox-cli" / "build.lock"
 
 
+@functools.lru_cache(maxsize=None)
 def ensure_default_image() -> str:
-    """Ensure the default sandbox image exists, build if needed."""
+    """Ensure the default sandbox image exists, build if needed (checked once per process)."""
     image_name = "sandbox-cli:default"
 
     with build_lock(_build_lock_path()):
@@ -360,7 +530,13 @@ def ensure_default_image() -> str:
 
 
 def build_template_if_exists(repo_root: Path) -> str:
-    """Build custom template if Dockerfile.sandbox exists, otherwise use default."""
+    """Build custom template if Dockerfile.sandbox exists, otherwise use default.
+
+    The template is tagged with a hash of Dockerfile.sandbox and the default
+    image's ID, and an existing tag is used without running docker build.
+    Files the Dockerfile COPYs or ADDs from the repo aren't in that hash, so
+    such Dockerfiles are built every time and docker's layer cache decides.
+    """
     # Always ensure default image exists (custom Dockerfiles may use FROM sandbox-cli:default)
     ensure_default_image()
 
@@ -368,8 +544,21 @@ def build_template_if_exists(repo_root: Path) -> str:
     if not dockerfile.exists():
         return "sandbox-cli:default"
 
-    image_name = f"sandbox-template:{repo_root.name}"
+    import hashlib
+    import re
+    content = dockerfile.read_bytes()
+    # COPY/ADD from the build context (not --from another stage)
+    copies_context = re.search(rb"^\s*(COPY|ADD)\s(?!.*--from=)", content, re.IGNORECASE | re.MULTILINE)
     with build_lock(_build_lock_path()):
+        # Rebuilding sandbox-cli:default changes its ID, and with it the tag
+        base = run(["docker", "image", "inspect", "-f", "{{.Id}}", "sandbox-cli:default"])
+        digest = hashlib.blake2b(content + base.stdout.strip().encode(), digest_size=8).hexdigest()
+        image_name = f"sandbox-template:{repo_root.name}-{digest}"
+        if not copies_context:
+            result = run(["docker", "image", "inspect", image_name])
+            if result.returncode == 0:
+                return image_name
+
         click.echo("Building project template...", err=True)
         result = run(
             ["docker", "build", "-t", image_name, "-f", str(dockerfile), str(repo_root)],
@@ -378,12 +567,82 @@ def build_template_if_exists(repo_root: Path) -> str:
         if result.returncode != 0:
             click.echo("Failed to build project template", err=True)
             sys.exit(1)
+        _remove_stale_templates(repo_root.name, image_name)
     return image_name
 
 
+def _remove_stale_templates(repo_name: str, keep: str) -> None:
+    """Remove this repo's other sandbox-template tags (from earlier Dockerfile versions)."""
+    import re
+    result = run(["docker", "image", "ls", "--format", "{{.Tag}}", "sandbox-template"])
+    # Also matches the unhashed tag older versions used
+    pattern = re.compile(rf"{re.escape(repo_name)}(-[0-9a-f]{{16}})?")
+    stale = [
+        f"sandbox-template:{tag}" for tag in result.stdout.split()
+        if pattern.fullmatch(tag) and f"sandbox-template:{tag}" != keep
+    ]
+    if stale:
+        # Without -f, so tags still used by a container are kept
+        run(["docker", "image", "rm", *stale])
+
+
 def get_gh_token() -> str:
-    """Get GitHub token: $GH_TOKEN env var first, then gh CLI fallback."""
-    token = os.environ.get("GH_TOKEN", "").strip()
+    """Get GitHub token: token env vars first, then gh's stored token.
+
+    $GH_TOKEN always wins (as it did before the other vars were read), even
+    for enterprise hosts where gh itself ignores it. After that come the vars
+    gh reads for the host: GITHUB_TOKEN for github.com and *.ghe.com, the
+    GH_/GITHUB_ENTERPRISE_TOKEN pair for other GH_HOSTs.
+    """
+    host = os.environ.get("GH_HOST", "github.com")
+    if host == "github.com" or host.endswith(".ghe.com"):
+        env_vars = ("GH_TOKEN", "GITHUB_TOKEN")
+    else:
+        env_vars = ("GH_TOKEN", "GH_ENTERPRISE_TOKEN", "GITHUB_ENTERPRISE_TOKEN")
+    for var in env_vars:
+        token = os.environ.get(var, "").strip()
+        if token:
+            return token
+    return _gh_cli_token()
+
+
+def _gh_hosts_token() -> str:
+    """Read the active token for $GH_HOST (default github.com) from gh's hosts.yml, if stored there.
+
+    Newer gh versions keep the token in the system keyring instead, in which
+    case this returns "".
+    """
+    config_dir = os.environ.get("GH_CONFIG_DIR")
+    if not config_dir:
+        xdg = os.environ.get("XDG_CONFIG_HOME")
+        config_dir = Path(xdg) / "gh" if xdg else Path.home() / ".config" / "gh"
+    try:
+        text = (Path(config_dir) / "hosts.yml").read_text()
+    except OSError:
+        return ""
+
+    host = os.environ.get("GH_HOST", "github.com")
+    in_host = False
+    token, token_indent = "", None
+    for line in text.splitlines():
+        if line and not line[0].isspace():
+            in_host = line.rstrip().rstrip(":").strip("'\"") == host
+            continue
+        if not in_host:
+            continue
+        key, _, value = line.strip().partition(":")
+        indent = len(line) - len(line.lstrip())
+        # The host-level oauth_token is the active account; per-user entries
+        # under `users:` are nested deeper
+        if key == "oauth_token" and (token_indent is None or indent < token_indent):
+            token, token_indent = value.strip().strip("'\""), indent
+    return token
+
+
+@functools.lru_cache(maxsize=None)
+def _gh_cli_token() -> str:
+    """Get gh's stored token (once per process), from hosts.yml or the gh CLI."""
+    token = _gh_hosts_token()
     if token:
         return token
     result = run(["gh", "auth", "token"])
@@ -486,12 +745,20 @@ def get_provider(name: str) -> dict:
 
 
 def find_available_ports(count: int = 3, start: int = 49152, end: int = 65535) -> list[int]:
-    """Find available ports in the dynamic/private port range."""
+    """Find available ports in the dynamic/private port range.
+
+    Ports are probed in random order so sandboxes started at the same time
+    don't both pick the lowest free ports before docker has bound them.
+    """
+    import random
     import socket
     ports = []
-    for port in range(start, end):
-        if len(ports) >= count:
-            break
+    tried = set()
+    while len(ports) < count and len(tried) < end - start:
+        port = random.randrange(start, end)
+        if port in tried:
+            continue
+        tried.add(port)
         try:
             with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
                 s.bind(("", port))
@@ -501,16 +768,28 @@ def find_available_ports(count: int = 3, start: int = 49152, end: int = 65535) -
     return ports
 
 
+def container_state(name: str) -> tuple[bool, bool]:
+    """Return (exists, running) for a docker container in a single daemon round trip."""
+    import re
+    # Anchored so "sandbox-repo-foo" doesn't also match "sandbox-repo-foo-2";
+    # older daemons match the filter against the "/"-prefixed name.
+    result = run(["docker", "ps", "-a", "--filter", f"name=^/?{re.escape(name)}$", "--format", "{{.State}}"])
+    if result.returncode != 0:
+        return False, False
+    lines = result.stdout.split()
+    if not lines:
+        return False, False
+    return True, lines[0] == "running"
+
+
 def container_exists(name: str) -> bool:
     """Check if a docker container exists."""
-    result = run(["docker", "container", "inspect", name])
-    return result.returncode == 0
+    return container_state(name)[0]
 
 
 def container_running(name: str) -> bool:
     """Check if a docker container is running."""
-    result = run(["docker", "container", "inspect", "-f", "{{.State.Running}}", name])
-    return result.returncode == 0 and result.stdout.strip() == "true"
+    return container_state(name)[1]
 
 
 def run_sandbox_background(
@@ -529,6 +808,8 @@ def run_sandbox_background(
     extra_mounts: list[str] | None = None,
 ) -> dict:
     """Run a sandbox task in background mode. Returns result dict."""
+    import json
+
     sb = resolve_sandbox(repo_root, name, logs_dir=logs_dir, repo_name=repo_name)
     sname = sb["sname"]
     container_name = sb["container"]
@@ -538,7 +819,8 @@ def run_sandbox_background(
 
     if continue_session:
         # Resume: container must exist
-        if not container_exists(container_name):
+        exists, running = container_state(container_name)
+        if not exists:
             return {**error_result, "error": f"No container to resume: {container_name}"}
 
         # Load provider from state file (overrides CLI flag)
@@ -564,7 +846,7 @@ def run_sandbox_background(
         agent_cmd = resume_provider["build_resume_cmd"](model, worktree_path)
 
         # Start container if stopped, then exec
-        if not container_running(container_name):
+        if not running:
             run(["docker", "start", container_name])
         exec_result = run(["docker", "exec", container_name] + agent_cmd)
 
@@ -615,11 +897,12 @@ def run_sandbox_background(
     home = Path.home()
     agent_cmd = task_provider["build_cmd"](task, model, worktree_path)
 
+    wt, mg = str(worktree_path), str(main_git)
     docker_cmd = [
         "docker", "run", "-d",
         "--name", container_name,
-        "-v", f"{worktree_path}:{worktree_path}",
-        "-v", f"{main_git}:{main_git}",
+        "-v", f"{wt}:{wt}",
+        "-v", f"{mg}:{mg}",
     ]
     for mount in task_provider["volume_mounts"](home):
         docker_cmd.extend(["-v", mount])
@@ -628,7 +911,7 @@ def run_sandbox_background(
     for env_var in task_provider["env_vars"]():
         docker_cmd.extend(["-e", env_var])
     docker_cmd.extend([
-        "-w", str(worktree_path),
+        "-w", wt,
         image,
     ])
     docker_cmd.extend(agent_cmd)
@@ -654,6 +937,8 @@ def run_sandbox_background(
 def _collect_and_finalize(sb: dict, exit_code: int, base_commit: str, repo_root: Path, name: str,
                           push: bool = False, cleanup: bool = False, provider: dict | None = None) -> dict:
     """Shared post-wait finalization: save logs, commit, optionally push/cleanup, build result."""
+    import json
+
     if provider is None:
         provider = get_provider("claude")
     container_name = sb["container"]
@@ -661,11 +946,12 @@ def _collect_and_finalize(sb: dict, exit_code: int, base_commit: str, repo_root:
     worktree_path = sb["worktree"]
     log_file = sb["log_json"]
 
-    # Save raw logs (stdout and stderr separately)
-    log_result = run(["docker", "logs", container_name])
+    # Save raw logs (stdout and stderr separately). These can run to megabytes
+    # of stream-json, so they go to disk as bytes without a decode/encode pass.
+    log_result = run(["docker", "logs", container_name], text=False)
     sb["log_raw"].parent.mkdir(parents=True, exist_ok=True)
-    sb["log_raw"].write_text(log_result.stdout)
-    sb["log_err"].write_text(log_result.stderr)
+    sb["log_raw"].write_bytes(log_result.stdout)
+    sb["log_err"].write_bytes(log_result.stderr)
 
     # Commit
     commit_succeeded = False
@@ -772,6 +1058,7 @@ def run_sandbox_remote(
     provider: str = "claude",
 ) -> dict:
     """Run a background sandbox task on Modal. Returns result dict."""
+    import json
     import re
 
     # Lazy import Modal — only required when --remote is used
@@ -999,34 +1286,51 @@ def run_sandbox_remote(
     return result
 
 
-def run_sandbox(name: str, repo_name: str, main_git: Path, worktree_path: Path, template: str | None = None, extra_mounts: list[str] | None = None) -> None:
-    """Launch interactive sandbox session, then start cleanup Claude on exit."""
+def run_sandbox(name: str, repo_name: str, main_git: Path, worktree_path: Path,
+                template: str | Callable[[], str] | None = None,
+                extra_mounts: list[str] | None = None, state: tuple[bool, bool] | None = None) -> None:
+    """Launch interactive sandbox session, then start cleanup Claude on exit.
+
+    template is an image name, or a callable returning one; a callable is only
+    invoked when a new container has to be created.
+    state is the container's (exists, running) pair if the caller already has it.
+    """
+    import json
+
     home = Path.home()
-    image = template or ensure_default_image()
     container_name = f"sandbox-{repo_name}-{name}"
     repo_root = main_git.parent
 
     claude_cmd = ["claude", "--dangerously-skip-permissions"]
 
     # Check if container already exists - session lives in the container
-    if container_exists(container_name):
+    exists, running = state if state is not None else container_state(container_name)
+    if exists:
         claude_cmd.append("--continue")
-        if container_running(container_name):
+        if running:
             # Exec into running container
             cmd_parts = ["docker", "exec", "-it", container_name] + claude_cmd
         else:
             # Start stopped container, then exec
-            run(["docker", "start", container_name], capture=False)
+            started = run(["docker", "start", container_name])
+            if started.returncode != 0:
+                click.echo(f"Failed to start container {container_name}: {started.stderr.strip()}", err=True)
+                sys.exit(1)
             cmd_parts = ["docker", "exec", "-it", container_name] + claude_cmd
     else:
+        image = (template() if callable(template) else template) or ensure_default_image()
+
+        # Paths appear several times in the argv below; stringify them once
+        wt, mg, hm = str(worktree_path), str(main_git), str(home)
+
         # Build .claude.json from host config, overlaying sandbox requirements
         import tempfile
         host_claude_json = home / ".claude.json"
         claude_json = json.loads(host_claude_json.read_text()) if host_claude_json.exists() else {}
         claude_json["hasCompletedOnboarding"] = True
         projects = claude_json.setdefault("projects", {})
-        projects[str(worktree_path)] = {
-            **projects.get(str(worktree_path), {}),
+        projects[wt] = {
+            **projects.get(wt, {}),
             "hasTrustDialogAccepted": True,
             "hasCompletedProjectOnboarding": True,
         }
@@ -1040,18 +1344,18 @@ def run_sandbox(name: str, repo_name: str, main_git: Path, worktree_path: Path,
         cmd_parts = [
             "docker", "run", "-it",
             "--name", container_name,
-            "-v", f"{worktree_path}:{worktree_path}",
-            "-v", f"{main_git}:{main_git}",
-            "-v", f"{home}/.claude:/home/agent/.claude",
+            "-v", f"{wt}:{wt}",
+            "-v", f"{mg}:{mg}",
+            "-v", f"{hm}/.claude:/home/agent/.claude",
             "-v", f"{claude_json_file.name}:/home/agent/.claude.json",
-            "-v", f"{home}/.config/gh:/home/agent/.config/gh:ro",
+            "-v", f"{hm}/.config/gh:/home/agent/.config/gh:ro",
             "-e", f"CLAUDE_CODE_OAUTH_TOKEN={get_auth_token()}",
             "-e", f"GH_TOKEN={get_gh_token()}",
             "-e", "CLAUDE_CONFIG_DIR=/home/agent/.claude",
             "-e", "FORCE_COLOR=1",
             "-e", "COLORTERM=truecolor",
             "-e", "npm_config_store_dir=/pnpm-store",
-            "-v", f"{home}/.ssh:/home/agent/.ssh:ro",
+            "-v", f"{hm}/.ssh:/home/agent/.ssh:ro",
             "-v", "pnpm-store:/pnpm-store",
         ]
         for mount in (extra_mounts or []):
@@ -1063,7 +1367,7 @@ def run_sandbox(name: str, repo_name: str, main_git: Path, worktree_path: Path,
         ports_prompt = f"You are running in a sandbox. Available ports for dev servers: {', '.join(map(str, ports))}. When starting dev servers, use --port {ports[0]} --host 0.0.0.0 (host binding required for port forwarding)."
         cmd_parts.extend([
             "-e", f"SANDBOX_PORTS={','.join(map(str, ports))}",
-            "-w", str(worktree_path),
+            "-w", wt,
             image,
         ])
         cmd_parts.extend(claude_cmd)
@@ -1109,7 +1413,11 @@ def run_sandbox(name: str, repo_name: str, main_git: Path, worktree_path: Path,
         summary_parts.append(f"Uncommitted:\n{uncommitted}")
     summary = "\n\n".join(summary_parts)
 
-    # Changes exist — launch Claude for integration
+    # Changes exist — launch Claude for integration. Paths are shell-quoted
+    # since Claude runs these lines verbatim (home dirs may contain spaces).
+    import shlex
+    wt_q = shlex.quote(str(worktree_path))
+    branch_q = shlex.quote(name)
     cleanup_prompt = f"""\
 Sandbox "{name}" has changes to integrate. Present the summary below, then \
 merge into main. Do NOT run git diff or git log — everything you need is here.
@@ -1120,13 +1428,13 @@ Your job:
 1. Present the summary above to the user.
 2. Ask: merge into main, or create a PR? (Two options only.)
 3. If there are uncommitted changes, commit them first:
-   git -C {worktree_path} add -A && git -C {worktree_path} commit -m "<summarize all changes on the branch>"
-4. To merge: cd {repo_root} && git merge {name} --no-ff
-   To PR: git -C {worktree_path} push -u origin {name} && gh pr create
+   git -C {wt_q} add -A && git -C {wt_q} commit -m "<summarize all changes on the branch>"
+4. To merge: cd {shlex.quote(str(repo_root))} && git merge {branch_q} --no-ff
+   To PR: git -C {wt_q} push -u origin {branch_q} && gh pr create
 5. After integration, clean up automatically — no confirmation needed:
-   docker rm -f {container_name}
-   git worktree remove {worktree_path}
-   git branch -D {name}"""
+   docker rm -f {shlex.quote(container_name)}
+   git worktree remove {wt_q}
+   git branch -D {branch_q}"""
     os.execvp("claude", ["claude", cleanup_prompt])
 
 
@@ -1149,6 +1457,7 @@ COMMANDS:
            --push                  Push branch to origin after successful commit
            --cleanup               Remove worktree after completion
            --remote                Run background task on Modal (no local Docker required)
+           --fetch                 Fetch from origin before checking for a remote branch
            Interactive: launches Docker container with Claude CLI
            Background:  commits changes, returns JSON to stdout
            Remote:      clones repo inside Modal sandbox, pushes results from cloud
@@ -1168,6 +1477,8 @@ COMMANDS:
            <token>                 Token from `claude setup-token` (omit to check status)
 
   ls       List worktrees and containers for current repo
+           --watch                 Keep updating as containers start, stop, or are removed
+                                   (worktrees are re-read when a container is created or removed)
 
   ports    Show available ports for a sandbox
            <name>                  Sandbox name
@@ -1220,8 +1531,7 @@ def cli(ctx):
 
 def branch_exists(branch: str) -> bool:
     """Check if a local branch exists."""
-    result = run(["git", "show-ref", "--verify", "--quiet", f"refs/heads/{branch}"])
-    return result.returncode == 0
+    return ref_exists(f"refs/heads/{branch}")
 
 
 def get_worktree_for_branch(branch: str) -> Path | None:
@@ -1234,16 +1544,32 @@ def get_worktree_for_branch(branch: str) -> Path | None:
 
 
 def remote_branch_exists(branch: str) -> bool:
-    """Check if a remote branch exists."""
-    # Fetch first to ensure we have latest refs
-    run(["git", "fetch", "--quiet"])
-    result = run(["git", "show-ref", "--verify", "--quiet", f"refs/remotes/origin/{branch}"])
-    return result.returncode == 0
+    """Check if a remote-tracking branch exists (as of the last fetch)."""
+    return ref_exists(f"refs/remotes/origin/{branch}")
 
 
-def sandbox_exists(repo_name: str, name: str) -> bool:
-    """Check if a sandbox container exists."""
-    return container_exists(f"sandbox-{repo_name}-{name}")
+# Skip `start --fetch` if the repo was fetched more recently than this (seconds)
+FETCH_MAX_AGE = 300
+
+
+def fetch_if_stale(main_git: Path) -> bool:
+    """Run `git fetch` unless a FETCH_HEAD shows a fetch within FETCH_MAX_AGE.
+
+    FETCH_HEAD is per worktree (a fetch in a linked worktree writes
+    .git/worktrees/<name>/FETCH_HEAD), so the newest one counts: remote refs
+    are shared, whichever worktree fetched them. Returns True if a fetch was run.
+    """
+    import time
+    last_fetch = 0.0
+    for fetch_head in [main_git / "FETCH_HEAD", *main_git.glob("worktrees/*/FETCH_HEAD")]:
+        try:
+            last_fetch = max(last_fetch, fetch_head.stat().st_mtime)
+        except OSError:
+            pass
+    if time.time() - last_fetch < FETCH_MAX_AGE:
+        return False
+    run(["git", "fetch", "--quiet"])
+    return True
 
 
 def generate_sandbox_name() -> str:
@@ -1285,8 +1611,12 @@ def auth(token):
 @click.option("--mount", "extra_mounts", multiple=True,
               help="Extra volume mount (host:container[:ro]). Repeatable.")
 @click.option("--remote", is_flag=True, help="Run background task on Modal instead of local Docker.")
-def start(name, continue_session, task, task_file, model, push, cleanup, provider, extra_mounts, remote):
+@click.option("--fetch", is_flag=True,
+              help="Fetch from origin before looking for a remote branch (skipped if fetched in the last 5 minutes).")
+def start(name, continue_session, task, task_file, model, push, cleanup, provider, extra_mounts, remote, fetch):
     """Start a sandbox (creates if new, resumes if exists)."""
+    import json
+
     if remote and not (task or task_file):
         click.echo("--remote only supports background task mode (use --task or --task-file)", err=True)
         sys.exit(1)
@@ -1349,9 +1679,16 @@ def start(name, continue_session, task, task_file, model, push, cleanup, provide
         return
 
     if task or continue_session:
-        # Local Docker background mode
-        main_git = get_main_git_dir(repo_root)
-        image = build_template_if_exists(repo_root)
+        # Local Docker background mode. The image build, the .git lookup and
+        # (for new containers) the gh token lookup are independent, so they
+        # run side by side; the token lands in get_gh_token's cache.
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            if not continue_session:
+                pool.submit(get_gh_token)
+            main_git_future = pool.submit(get_main_git_dir, repo_root)
+            image = build_template_if_exists(repo_root)
+        main_git = main_git_future.result()
         result = run_sandbox_background(
             name=name,
             repo_root=repo_root,
@@ -1373,32 +1710,41 @@ def start(name, continue_session, task, task_file, model, push, cleanup, provide
     sname = safe_name(name)
     repo_name = repo_root.name
     worktree_path = get_worktree_path(repo_root, sname)
-    main_git = get_main_git_dir(repo_root)
 
-    if worktree_path.exists() and sandbox_exists(repo_name, sname):
+    # Gather all git and docker state up front (one query each, side by side)
+    # so the branches below dispatch on local values only.
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        state_future = pool.submit(container_state, f"sandbox-{repo_name}-{sname}")
+        ctx = resolve_context(name, fetch=fetch)
+    state = state_future.result()
+    main_git = ctx["main_git"]
+    worktree_exists = worktree_path.exists()
+    # Only needed if run_sandbox ends up creating a container; resuming an
+    # existing one skips the image check/build entirely
+    template = functools.partial(build_template_if_exists, repo_root)
+
+    if worktree_exists and state[0]:
         # Existing sandbox - resume session
         click.echo(f"Resuming sandbox: {sname}", err=True)
-        template = build_template_if_exists(repo_root)
-        run_sandbox(sname, repo_name, main_git, worktree_path, template=template, extra_mounts=list(extra_mounts))
-    elif worktree_path.exists():
+        run_sandbox(sname, repo_name, main_git, worktree_path, template=template, extra_mounts=list(extra_mounts),
+                    state=state)
+    elif worktree_exists:
         # Worktree exists but no sandbox - start fresh
-        template = build_template_if_exists(repo_root)
         click.echo(f"Starting sandbox: {sname}", err=True)
-        run_sandbox(sname, repo_name, main_git, worktree_path, template=template, extra_mounts=list(extra_mounts))
-    elif branch_exists(name):
+        run_sandbox(sname, repo_name, main_git, worktree_path, template=template, extra_mounts=list(extra_mounts),
+                    state=state)
+    elif ctx["has_local"]:
         # Existing local branch - check if already in a worktree
         existing_wt = get_worktree_for_branch(name)
         if existing_wt:
             # Branch already checked out - use existing worktree
             click.echo(f"Using existing worktree for branch: {name}", err=True)
-            template = build_template_if_exists(repo_root)
             # Extract sandbox name from worktree path
             wt_sname = existing_wt.name.split("__")[-1] if "__" in existing_wt.name else sname
             run_sandbox(wt_sname, repo_name, main_git, existing_wt, template=template)
         else:
             # Create worktree from existing branch
-            template = build_template_if_exists(repo_root)
-
             if not git_worktree_add(worktree_path, name, new_branch=False):
                 click.echo(f"Failed to create worktree for branch: {name}", err=True)
                 sys.exit(1)
@@ -1408,12 +1754,10 @@ def start(name, continue_session, task, task_file, model, push, cleanup, provide
                 click.echo(f"Copied: {', '.join(copied)}", err=True)
 
             click.echo(f"Created sandbox from local branch: {name}", err=True)
-            run_sandbox(sname, repo_name, main_git, worktree_path, template=template, extra_mounts=list(extra_mounts))
-    elif remote_branch_exists(name):
+            run_sandbox(sname, repo_name, main_git, worktree_path, template=template, extra_mounts=list(extra_mounts),
+                        state=state)
+    elif ctx["has_remote"]:
         # Existing remote branch - create worktree tracking it
-        template = build_template_if_exists(repo_root)
-
-        # Create worktree tracking the remote branch
         if not git_worktree_add(worktree_path, name, new_branch=False):
             click.echo(f"Failed to create worktree for remote branch: {name}", err=True)
             sys.exit(1)
@@ -1423,7 +1767,8 @@ def start(name, continue_session, task, task_file, model, push, cleanup, provide
             click.echo(f"Copied: {', '.join(copied)}", err=True)
 
         click.echo(f"Created sandbox from remote branch: {name}", err=True)
-        run_sandbox(sname, repo_name, main_git, worktree_path, template=template, extra_mounts=list(extra_mounts))
+        run_sandbox(sname, repo_name, main_git, worktree_path, template=template, extra_mounts=list(extra_mounts),
+                    state=state)
     else:
         # New sandbox with new branch
         # Pull latest changes before creating branch
@@ -1432,8 +1777,6 @@ def start(name, continue_session, task, task_file, model, push, cleanup, provide
         if pull_result.returncode != 0:
             click.echo("Warning: Could not pull latest changes", err=True)
 
-        template = build_template_if_exists(repo_root)
-
         if not git_worktree_add(worktree_path, name, new_branch=True):
             click.echo(f"Failed to create worktree", err=True)
             sys.exit(1)
@@ -1443,7 +1786,8 @@ def start(name, continue_session, task, task_file, model, push, cleanup, provide
             click.echo(f"Copied: {', '.join(copied)}", err=True)
 
         click.echo(f"Created sandbox: {sname}", err=True)
-        run_sandbox(sname, repo_name, main_git, worktree_path, template=template, extra_mounts=list(extra_mounts))
+        run_sandbox(sname, repo_name, main_git, worktree_path, template=template, extra_mounts=list(extra_mounts),
+                    state=state)
 
 
 @cli.command()
@@ -1459,11 +1803,12 @@ def join(name):
     repo_name = repo_root.name
     container_name = f"sandbox-{repo_name}-{sname}"
 
-    if not container_exists(container_name):
+    exists, running = container_state(container_name)
+    if not exists:
         click.echo(f"No sandbox found: {sname}", err=True)
         sys.exit(1)
 
-    if not container_running(container_name):
+    if not running:
         click.echo(f"Sandbox is not running: {sname}", err=True)
         sys.exit(1)
 
@@ -1475,6 +1820,7 @@ def join(name):
 @click.argument("name")
 def read(name):
     """Read results from a completed or running sandbox task."""
+    import json
     import re
 
     repo_root = get_repo_root()
@@ -1593,17 +1939,18 @@ def read(name):
             click.echo(json.dumps(result))
             return
 
-        # Docker running state
+        # Docker running state — recover below if the container still exists
         base_commit = data.get("baseCommit", "")
         state_provider_name = data.get("provider", "claude")
-        if not container_exists(container_name):
-            click.echo(json.dumps({"error": "Task was running but container is gone"}))
-            return
-        # Container exists — recover below
 
     # 2. Check for container (running or exited)
-    if container_exists(container_name):
-        if container_running(container_name):
+    exists, running = container_state(container_name)
+    if result_path.exists() and not exists:
+        # Only a docker running-state file gets this far
+        click.echo(json.dumps({"error": "Task was running but container is gone"}))
+        return
+    if exists:
+        if running:
             run(["docker", "wait", container_name])
 
         # Get exit code (works for both just-finished and already-exited containers)
@@ -1633,17 +1980,64 @@ def read(name):
 
 
 @cli.command("ls")
-def list_cmd():
+@click.option("--watch", is_flag=True, help="Keep the listing on screen and update it as containers change (worktrees are re-read when one is created or removed).")
+def list_cmd(watch):
     """List worktrees and containers for current repo."""
     repo_root = get_repo_root()
     if not repo_root:
         click.echo("Not in a git repository", err=True)
         sys.exit(1)
 
-    repo_name = repo_root.name
+    prefix = f"sandbox-{repo_root.name}-"
+    if watch:
+        # Follow docker's event stream and patch the cached listing, rather
+        # than re-running `docker ps` on a timer. Subscribed before the
+        # snapshot so no change slips in between.
+        events = subprocess.Popen(
+            ["docker", "events", "--filter", "type=container",
+             "--format", "{{.Action}}\t{{.Actor.Attributes.name}}\t{{.Actor.ID}}"],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+
+    worktrees, containers = _list_sandboxes(prefix)
+    _print_ls(worktrees, containers)
+    if not watch:
+        return
+
+    try:
+        for line in events.stdout:
+            action, _, rest = line.rstrip("\n").partition("\t")
+            name, _, container_id = rest.partition("\t")
+            if name.startswith(prefix) and apply_container_event(containers, action, name, container_id):
+                if action in ("create", "destroy"):
+                    # A sandbox was started or removed; its worktree comes or goes with it
+                    worktrees = git_worktree_list()
+                click.clear()
+                _print_ls(worktrees, containers)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        events.terminate()
+        events.wait()
+
+
+def _list_sandboxes(prefix: str) -> tuple[list[dict], list[dict]]:
+    """Run `git worktree list` and `docker ps` concurrently.
+
+    Returns (worktrees, containers), with containers limited to names starting with prefix.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        worktrees = pool.submit(git_worktree_list)
+        containers = docker_container_ls(prefix)
+    return worktrees.result(), containers
+
 
+def _print_ls(worktrees: list[dict], containers: list[dict]) -> None:
+    """Print the ls listing."""
     click.echo("=== Worktrees ===")
-    worktrees = git_worktree_list()
     for wt in worktrees:
         branch = wt.get("branch", "").replace("refs/heads/", "")
         click.echo(f"  {wt['path']}  [{branch}]")
@@ -1652,14 +2046,10 @@ def list_cmd():
         click.echo("  (none)")
 
     click.echo("\n=== Containers ===")
-    containers = docker_container_ls()
-    prefix = f"sandbox-{repo_name}-"
-    repo_containers = [c for c in containers if c.get("name", "").startswith(prefix)]
-
-    for c in repo_containers:
+    for c in containers:
         click.echo(f"  {c['name']}  ({c['status']})")
 
-    if not repo_containers:
+    if not containers:
         click.echo("  (none)")
 
 
@@ -1670,6 +2060,8 @@ def list_cmd():
 @click.option("--yes", "-y", is_flag=True, help="Skip prompts and auto-delete branch.")
 def rm(name, remove_all, force, yes):
     """Remove a sandbox and all its artifacts."""
+    import json
+
     repo_root = get_repo_root()
     if not repo_root:
         click.echo("Not in a git repository", err=True)
@@ -1737,20 +2129,28 @@ def _rm_all(repo_root: Path):
     repo_name = repo_root.name
     click.echo(f"Removing all sandboxes for {repo_name}...")
 
-    # Remove containers
-    containers = docker_container_ls()
-    prefix = f"sandbox-{repo_name}-"
-    for c in containers:
-        if c.get("name", "").startswith(prefix):
-            if docker_container_rm(c["name"]):
-                click.echo(f"  Removed container: {c['name']}")
+    from concurrent.futures import ThreadPoolExecutor
 
-    # Remove worktrees
-    worktrees = git_worktree_list()
-    for wt in worktrees:
-        if f"{repo_name}__" in wt["path"]:
-            if git_worktree_remove(Path(wt["path"])):
-                click.echo(f"  Removed worktree: {wt['path']}")
+    worktrees, containers = _list_sandboxes(f"sandbox-{repo_name}-")
+    container_names = [c["name"] for c in containers]
+    worktree_paths = [wt["path"] for wt in worktrees if f"{repo_name}__" in wt["path"]]
+
+    # All containers go in one `docker rm` while the worktrees are removed
+    # alongside; `git worktree remove` takes a repo-level lock, so those run
+    # one at a time in a single worker.
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        worktrees_removed = pool.submit(
+            lambda: [git_worktree_remove(path) for path in worktree_paths]
+        )
+        containers_removed = docker_containers_rm(container_names)
+    worktrees_removed = worktrees_removed.result()
+
+    for container_name in container_names:
+        if container_name in containers_removed:
+            click.echo(f"  Removed container: {container_name}")
+    for path, removed in zip(worktree_paths, worktrees_removed):
+        if removed:
+            click.echo(f"  Removed worktree: {path}")
 
     # Remove log files
     logs_dir = get_logs_dir()
@@ -1759,7 +2159,10 @@ def _rm_all(repo_root: Path):
             f.unlink()
             click.echo(f"  Removed: {f.name}")
 
-    run(["git", "worktree", "prune"])
+    # A successful `git worktree remove` already drops its admin entry; only
+    # prune when something was left behind (e.g. a directory deleted by hand).
+    if not all(worktrees_removed):
+        run(["git", "worktree", "prune"])
     click.echo("Done")
 
 
@@ -1776,21 +2179,15 @@ def ports(name):
     repo_name = repo_root.name
     container_name = f"sandbox-{repo_name}-{sname}"
 
-    if not container_exists(container_name):
-        click.echo(f"Sandbox not found: {sname}", err=True)
-        sys.exit(1)
-
-    # Get SANDBOX_PORTS env var from container
+    # Get SANDBOX_PORTS env var from container (inspect fails if it doesn't exist)
     result = run(["docker", "inspect", "-f", "{{range .Config.Env}}{{println .}}{{end}}", container_name])
     if result.returncode != 0:
-        click.echo("Failed to inspect container", err=True)
+        click.echo(f"Sandbox not found: {sname}", err=True)
         sys.exit(1)
 
-    ports = None
-    for line in result.stdout.strip().split("\n"):
-        if line.startswith("SANDBOX_PORTS="):
-            ports = line.split("=", 1)[1]
-            break
+    import re
+    match = re.search(r"^SANDBOX_PORTS=(.*)$", result.stdout, re.MULTILINE)
+    ports = match.group(1) if match else None
 
     if not ports:
         click.echo("No ports configured")
@@ -1800,15 +2197,9 @@ def ports(name):
     listen_result = run(["docker", "exec", container_name, "ss", "-tlnH"])
     listening = set()
     if listen_result.returncode == 0:
-        for line in listen_result.stdout.strip().split("\n"):
-            # Format: LISTEN 0 128 *:49152 *:*
-            parts = line.split()
-            if len(parts) >= 4:
-                addr = parts[3]
-                if ":" in addr:
-                    port = addr.rsplit(":", 1)[-1]
-                    if port.isdigit():
-                        listening.add(port)
+        # Format: LISTEN 0 128 *:49152 *:* -- the peer column ends in "*", so
+        # only the local address has a numeric port
+        listening.update(re.findall(r":(\d+)\s", listen_result.stdout))
 
     click.echo(f"Ports for {sname}:")
     for port in ports.split(","):
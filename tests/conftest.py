@@ -0,0 +1,39 @@
+"""Shared test fixtures."""
+
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+import sandbox_cli
+
+
+@pytest.fixture(scope="session")
+def runner():
+    """A CliRunner shared by all tests; it keeps no state between invokes."""
+    return CliRunner()
+
+
+@pytest.fixture(scope="session")
+def cli():
+    return sandbox_cli.cli
+
+
+@pytest.fixture(autouse=True)
+def mock_auth_token(request):
+    """Give unit tests a saved auth token; integration tests use the real one."""
+    if request.node.get_closest_marker("integration"):
+        yield
+        return
+    with patch("sandbox_cli.get_auth_token", return_value="test-token"):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def clear_process_caches():
+    """Reset sandbox_cli's per-process memoization between tests."""
+    yield
+    sandbox_cli._git_locations_at.cache_clear()
+    sandbox_cli.get_main_git_dir.cache_clear()
+    sandbox_cli._gh_cli_token.cache_clear()
+    sandbox_cli.ensure_default_image.cache_clear()
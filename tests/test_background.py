@@ -9,12 +9,6 @@ import pytest
 from sandbox_cli import run_sandbox_background
 
 
-@pytest.fixture(autouse=True)
-def mock_auth_token():
-    with patch("sandbox_cli.get_auth_token", return_value="test-token"):
-        yield
-
-
 class TestConflictChecks:
     """Background mode should exit on any naming conflict."""
 
@@ -132,7 +126,7 @@ def _make_run_mock(overrides=None):
         if "docker wait" in cmd_str:
             return MagicMock(returncode=0, stdout="0\n")
         if "docker logs" in cmd_str:
-            return MagicMock(returncode=0, stdout='{"type": "result", "result": "All done."}\n', stderr="")
+            return MagicMock(returncode=0, stdout=b'{"type": "result", "result": "All done."}\n', stderr=b"")
         if "status" in cmd_str and "--porcelain" in cmd_str:
             return MagicMock(returncode=0, stdout="M src/main.py\n")
         if "add" in cmd_str and "-A" in cmd_str:
@@ -490,3 +484,43 @@ class TestFailurePaths:
         )
 
         assert result["exitCode"] != 0
+
+
+class TestContinueSession:
+    @patch("sandbox_cli._collect_and_finalize")
+    @patch("sandbox_cli.run")
+    @patch("sandbox_cli.container_state")
+    def test_starts_stopped_container_with_one_state_query(self, mock_state, mock_run, mock_finalize, tmp_path):
+        mock_state.return_value = (True, False)
+        mock_run.return_value = MagicMock(returncode=0, stdout="abc123\n", stderr="")
+        mock_finalize.return_value = {"exitCode": 0}
+
+        result = run_sandbox_background(
+            name="test", repo_root=tmp_path, repo_name="myrepo",
+            main_git=tmp_path / ".git",
+            image="img", task=None, logs_dir=tmp_path / "logs",
+            continue_session=True,
+        )
+
+        assert result == {"exitCode": 0}
+        mock_state.assert_called_once_with("sandbox-myrepo-test")
+        cmds = [c.args[0] for c in mock_run.call_args_list]
+        assert ["docker", "start", "sandbox-myrepo-test"] in cmds
+        assert cmds.index(["docker", "start", "sandbox-myrepo-test"]) < next(
+            i for i, c in enumerate(cmds) if c[:2] == ["docker", "exec"]
+        )
+
+    @patch("sandbox_cli.run")
+    @patch("sandbox_cli.container_state")
+    def test_missing_container_is_an_error(self, mock_state, mock_run, tmp_path):
+        mock_state.return_value = (False, False)
+
+        result = run_sandbox_background(
+            name="test", repo_root=tmp_path, repo_name="myrepo",
+            main_git=tmp_path / ".git",
+            image="img", task=None, logs_dir=tmp_path / "logs",
+            continue_session=True,
+        )
+
+        assert "No container to resume" in result["error"]
+        mock_run.assert_not_called()
@@ -1,8 +1,10 @@
 """Tests for image build functions."""
 
 from pathlib import Path
+from subprocess import CompletedProcess
 from unittest.mock import MagicMock, patch, call
 
+import pytest
 
 from sandbox_cli import ensure_default_image, build_template_if_exists
 
@@ -28,13 +30,24 @@ def test_ensure_default_image_acquires_lock(mock_cli_dir, mock_run, mock_lock, t
     mock_lock.assert_called_once()
 
 
+@patch("sandbox_cli._build_lock_path")
+@patch("sandbox_cli.run")
+def test_ensure_default_image_checks_once_per_process(mock_run, mock_lock_path, tmp_path):
+    mock_lock_path.return_value = tmp_path / "build.lock"
+    mock_run.return_value = MagicMock(returncode=0)  # image exists
+
+    assert ensure_default_image() == "sandbox-cli:default"
+    assert ensure_default_image() == "sandbox-cli:default"
+    mock_run.assert_called_once()
+
+
 @patch("sandbox_cli.build_lock")
 @patch("sandbox_cli.run")
 def test_build_template_acquires_lock(mock_run, mock_lock, tmp_path):
     (tmp_path / "Dockerfile.sandbox").write_text("FROM node:20")
     mock_lock.return_value.__enter__ = MagicMock(return_value=None)
     mock_lock.return_value.__exit__ = MagicMock(return_value=False)
-    mock_run.return_value = MagicMock(returncode=0)
+    mock_run.return_value = MagicMock(returncode=0, stdout="sha256:aaa\n")
 
     build_template_if_exists(tmp_path)
     # Called twice: once for ensure_default_image(), once for custom build
@@ -57,3 +70,97 @@ def test_ensure_default_image_stderr_only(mock_cli_dir, mock_run, mock_lock_path
     ensure_default_image()
     captured = capsys.readouterr()
     assert "Building" not in captured.out  # should be on stderr, not stdout
+
+
+def fake_docker(state: dict):
+    """run() stand-in for the docker image commands, backed by state["images"] and state["base"]."""
+    def fake_run(cmd, **kwargs):
+        if cmd[:3] == ["docker", "image", "inspect"]:
+            if cmd[-1] == "sandbox-cli:default":
+                return CompletedProcess(cmd, 0, stdout=state["base"] + "\n", stderr="")
+            return CompletedProcess(cmd, 0 if cmd[-1] in state["images"] else 1, stdout="", stderr="")
+        if cmd[:2] == ["docker", "build"]:
+            state["images"].add(cmd[cmd.index("-t") + 1])
+            return CompletedProcess(cmd, 0)
+        if cmd[:3] == ["docker", "image", "ls"]:
+            tags = [i.split(":", 1)[1] for i in state["images"] if i.startswith("sandbox-template:")]
+            return CompletedProcess(cmd, 0, stdout="".join(f"{t}\n" for t in tags), stderr="")
+        if cmd[:3] == ["docker", "image", "rm"]:
+            state["images"].difference_update(cmd[3:])
+            return CompletedProcess(cmd, 0, stdout="", stderr="")
+        raise AssertionError(f"unexpected command: {cmd}")
+    return fake_run
+
+
+def docker_builds(mock_run) -> list[list[str]]:
+    return [c.args[0] for c in mock_run.call_args_list if c.args[0][:2] == ["docker", "build"]]
+
+
+@patch("sandbox_cli.ensure_default_image")
+@patch("sandbox_cli._build_lock_path")
+@patch("sandbox_cli.run")
+def test_build_template_skips_existing_image(mock_run, mock_lock_path, mock_default, tmp_path):
+    mock_lock_path.return_value = tmp_path / "build.lock"
+    (tmp_path / "Dockerfile.sandbox").write_text("FROM sandbox-cli:default")
+    mock_run.side_effect = fake_docker({"base": "sha256:aaa", "images": set()})
+
+    first = build_template_if_exists(tmp_path)
+    second = build_template_if_exists(tmp_path)
+    assert first == second
+    assert first.startswith(f"sandbox-template:{tmp_path.name}-")
+    assert len(docker_builds(mock_run)) == 1
+
+
+@patch("sandbox_cli.ensure_default_image")
+@patch("sandbox_cli._build_lock_path")
+@patch("sandbox_cli.run")
+def test_build_template_tag_tracks_dockerfile(mock_run, mock_lock_path, mock_default, tmp_path):
+    mock_lock_path.return_value = tmp_path / "build.lock"
+    dockerfile = tmp_path / "Dockerfile.sandbox"
+    other_repo = f"sandbox-template:{tmp_path.name}-x-0123456789abcdef"
+    state = {"base": "sha256:aaa", "images": {other_repo}}
+    mock_run.side_effect = fake_docker(state)
+
+    dockerfile.write_text("FROM node:20")
+    first = build_template_if_exists(tmp_path)
+    dockerfile.write_text("FROM node:22")
+    second = build_template_if_exists(tmp_path)
+    assert first != second
+    assert [b[b.index("-t") + 1] for b in docker_builds(mock_run)] == [first, second]
+    # The superseded tag is removed; other repos' tags are left alone
+    assert state["images"] == {second, other_repo}
+
+
+@patch("sandbox_cli.ensure_default_image")
+@patch("sandbox_cli._build_lock_path")
+@patch("sandbox_cli.run")
+def test_build_template_tag_tracks_base_image(mock_run, mock_lock_path, mock_default, tmp_path):
+    mock_lock_path.return_value = tmp_path / "build.lock"
+    (tmp_path / "Dockerfile.sandbox").write_text("FROM sandbox-cli:default")
+    state = {"base": "sha256:aaa", "images": set()}
+    mock_run.side_effect = fake_docker(state)
+
+    first = build_template_if_exists(tmp_path)
+    state["base"] = "sha256:bbb"  # sandbox-cli:default was rebuilt
+    second = build_template_if_exists(tmp_path)
+    assert first != second
+    assert len(docker_builds(mock_run)) == 2
+
+
+@pytest.mark.parametrize("dockerfile, builds", [
+    ("FROM sandbox-cli:default\nCOPY package.json /tmp/\n", 2),
+    ("FROM sandbox-cli:default\nadd scripts /opt/scripts\n", 2),
+    ("FROM node:20 AS deps\nFROM sandbox-cli:default\nCOPY --from=deps /app /app\n", 1),
+    ("FROM sandbox-cli:default\nRUN echo COPY\n", 1),
+])
+@patch("sandbox_cli.ensure_default_image")
+@patch("sandbox_cli._build_lock_path")
+@patch("sandbox_cli.run")
+def test_build_template_always_builds_context_copies(mock_run, mock_lock_path, mock_default, dockerfile, builds, tmp_path):
+    mock_lock_path.return_value = tmp_path / "build.lock"
+    (tmp_path / "Dockerfile.sandbox").write_text(dockerfile)
+    mock_run.side_effect = fake_docker({"base": "sha256:aaa", "images": set()})
+
+    build_template_if_exists(tmp_path)
+    build_template_if_exists(tmp_path)
+    assert len(docker_builds(mock_run)) == builds
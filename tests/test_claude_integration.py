@@ -6,6 +6,7 @@ from pathlib import Path
 
 import pytest
 
+pytestmark = pytest.mark.integration
 
 
 def _docker_available():
@@ -34,18 +35,6 @@ def require_docker_and_claude():
         pytest.fail("Claude CLI is not authenticated")
 
 
-@pytest.fixture
-def runner():
-    from click.testing import CliRunner
-    return CliRunner()
-
-
-@pytest.fixture
-def cli():
-    from sandbox_cli import cli
-    return cli
-
-
 @pytest.fixture
 def sandbox_name():
     """Generate a unique sandbox name for each test."""
@@ -6,6 +6,8 @@ from pathlib import Path
 
 import pytest
 
+pytestmark = pytest.mark.integration
+
 
 def _docker_available():
     try:
@@ -26,18 +28,6 @@ def require_docker_and_codex():
         pytest.fail("Codex is not authenticated (~/.codex/auth.json not found). Run: codex login")
 
 
-@pytest.fixture
-def runner():
-    from click.testing import CliRunner
-    return CliRunner()
-
-
-@pytest.fixture
-def cli():
-    from sandbox_cli import cli
-    return cli
-
-
 @pytest.fixture
 def sandbox_name():
     """Generate a unique sandbox name for each test."""
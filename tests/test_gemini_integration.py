@@ -7,6 +7,8 @@ from pathlib import Path
 
 import pytest
 
+pytestmark = pytest.mark.integration
+
 
 def _docker_available():
     try:
@@ -27,18 +29,6 @@ def require_docker_and_gemini():
         pytest.fail("Gemini is not authenticated. Set GEMINI_API_KEY or run: gemini (to login with Google account)")
 
 
-@pytest.fixture
-def runner():
-    from click.testing import CliRunner
-    return CliRunner()
-
-
-@pytest.fixture
-def cli():
-    from sandbox_cli import cli
-    return cli
-
-
 @pytest.fixture
 def sandbox_name():
     """Generate a unique sandbox name for each test."""
@@ -13,10 +13,13 @@ def _docker_available():
         return False
 
 
-pytestmark = pytest.mark.skipif(
-    not _docker_available(),
-    reason="Docker not available"
-)
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.skipif(
+        not _docker_available(),
+        reason="Docker not available"
+    ),
+]
 
 IMAGE_NAME = "sandbox-cli:test"
 DOCKERFILE = Path(__file__).parent.parent / "sandbox_cli" / "Dockerfile"
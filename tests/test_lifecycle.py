@@ -4,21 +4,6 @@ import json
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
-import pytest
-
-
-
-@pytest.fixture
-def runner():
-    from click.testing import CliRunner
-    return CliRunner()
-
-
-@pytest.fixture
-def cli():
-    from sandbox_cli import cli
-    return cli
-
 
 class TestNameReservation:
     """A name is permanently reserved once used. Only rm frees it."""
@@ -62,7 +47,7 @@ class TestNameReservation:
              patch("sandbox_cli.get_repo_root", return_value=Path("/Users/test/myrepo")), \
              patch("sandbox_cli.docker_container_rm", return_value=False), \
              patch("sandbox_cli.git_worktree_remove", return_value=False), \
-             patch("sandbox_cli.git_worktree_list", return_value=[]):
+             patch("sandbox_cli.git_worktree_list", autospec=True, return_value=[]):
             result = runner.invoke(cli, ["rm", "foo"])
 
         assert not (logs_dir / "sandbox-myrepo-foo.json").exists()
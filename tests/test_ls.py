@@ -0,0 +1,128 @@
+"""Tests for the ls command."""
+
+import io
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+# Repo root returned by the mocked get_repo_root
+REPO_ROOT = Path("/Users/test/myrepo")
+
+
+def fake_events(lines):
+    """A stand-in for the `docker events` Popen, streaming the given lines."""
+    proc = MagicMock()
+    proc.stdout = io.StringIO("".join(f"{line}\n" for line in lines))
+    return proc
+
+
+@patch("sandbox_cli.get_repo_root")
+def test_not_in_repo(mock_get_repo, runner, cli):
+    mock_get_repo.return_value = None
+    result = runner.invoke(cli, ["ls"])
+    assert result.exit_code == 1
+    assert "Not in a git repository" in result.output
+
+
+@patch("sandbox_cli.docker_container_ls", autospec=True)
+@patch("sandbox_cli.git_worktree_list", autospec=True)
+@patch("sandbox_cli.get_repo_root")
+def test_ls_lists_worktrees_and_containers(mock_get_repo, mock_wt_list, mock_ls, runner, cli):
+    mock_get_repo.return_value = REPO_ROOT
+    mock_wt_list.return_value = [
+        {"path": "/Users/test/myrepo", "branch": "refs/heads/main"},
+        {"path": "/Users/test/.sandbox/worktrees/myrepo__feature", "branch": "refs/heads/feature"},
+    ]
+    mock_ls.return_value = [{"id": "abc", "name": "sandbox-myrepo-feature", "status": "Up 2 minutes"}]
+
+    result = runner.invoke(cli, ["ls"])
+    assert result.exit_code == 0
+    mock_ls.assert_called_once_with("sandbox-myrepo-")
+    assert "  /Users/test/myrepo  [main]" in result.output
+    assert "  /Users/test/.sandbox/worktrees/myrepo__feature  [feature]" in result.output
+    assert "  sandbox-myrepo-feature  (Up 2 minutes)" in result.output
+
+
+@patch("sandbox_cli.docker_container_ls", autospec=True)
+@patch("sandbox_cli.git_worktree_list", autospec=True)
+@patch("sandbox_cli.get_repo_root")
+def test_ls_empty(mock_get_repo, mock_wt_list, mock_ls, runner, cli):
+    mock_get_repo.return_value = REPO_ROOT
+    mock_wt_list.return_value = []
+    mock_ls.return_value = []
+
+    result = runner.invoke(cli, ["ls"])
+    assert result.exit_code == 0
+    assert result.output.count("(none)") == 2
+
+
+@patch("sandbox_cli.subprocess.Popen")
+@patch("sandbox_cli.docker_container_ls", autospec=True)
+@patch("sandbox_cli.git_worktree_list", autospec=True)
+@patch("sandbox_cli.get_repo_root")
+def test_ls_does_not_watch_by_default(mock_get_repo, mock_wt_list, mock_ls, mock_popen, runner, cli):
+    mock_get_repo.return_value = REPO_ROOT
+    mock_wt_list.return_value = []
+    mock_ls.return_value = []
+
+    result = runner.invoke(cli, ["ls"])
+    assert result.exit_code == 0
+    mock_popen.assert_not_called()
+
+
+@patch("sandbox_cli.click.clear")
+@patch("sandbox_cli.subprocess.Popen")
+@patch("sandbox_cli.docker_container_ls", autospec=True)
+@patch("sandbox_cli.git_worktree_list", autospec=True)
+@patch("sandbox_cli.get_repo_root")
+def test_ls_watch_redraws_on_repo_events(mock_get_repo, mock_wt_list, mock_ls, mock_popen, mock_clear,
+                                         runner, cli):
+    mock_get_repo.return_value = REPO_ROOT
+    main_wt = {"path": "/Users/test/myrepo", "branch": "refs/heads/main"}
+    new_wt = {"path": "/Users/test/.sandbox/worktrees/myrepo__d", "branch": "refs/heads/d"}
+    # The create event re-reads worktrees, picking up the new sandbox's
+    mock_wt_list.side_effect = [[main_wt], [main_wt, new_wt]]
+    mock_ls.return_value = [{"id": "abc", "name": "sandbox-myrepo-a", "status": "Exited (0) 1 hour ago"}]
+    events = fake_events([
+        "start\tsandbox-myrepo-a\tabc",
+        "die\tsandbox-other-b\tdef",  # another repo
+        "create\tsandbox-myrepo2-c\tfed",  # another repo sharing the name as a prefix
+        "create\tsandbox-myrepo-d\t0123456789abcdef",
+        "exec_start: bash\tsandbox-myrepo-a\tabc",  # no status change
+    ])
+    mock_popen.return_value = events
+
+    result = runner.invoke(cli, ["ls", "--watch"])
+    assert result.exit_code == 0
+    assert mock_popen.call_args.args[0][:2] == ["docker", "events"]
+    # Initial listing plus one redraw per event that changed it
+    assert mock_clear.call_count == 2
+    assert result.output.count("=== Containers ===") == 3
+    last = result.output.split("=== Worktrees ===")[-1]
+    assert "  sandbox-myrepo-a  (Up)" in last
+    assert "  sandbox-myrepo-d  (Created)" in last
+    assert "  /Users/test/.sandbox/worktrees/myrepo__d  [d]" in last
+    assert mock_wt_list.call_count == 2
+    assert "sandbox-other" not in result.output
+    assert "sandbox-myrepo2" not in result.output
+    events.terminate.assert_called_once()
+    events.wait.assert_called_once()
+
+
+@patch("sandbox_cli.click.clear")
+@patch("sandbox_cli.subprocess.Popen")
+@patch("sandbox_cli.docker_container_ls", autospec=True)
+@patch("sandbox_cli.git_worktree_list", autospec=True)
+@patch("sandbox_cli.get_repo_root")
+def test_ls_watch_stops_on_interrupt(mock_get_repo, mock_wt_list, mock_ls, mock_popen, mock_clear, runner, cli):
+    mock_get_repo.return_value = REPO_ROOT
+    mock_wt_list.return_value = []
+    mock_ls.return_value = []
+    events = MagicMock()
+    events.stdout.__iter__.side_effect = KeyboardInterrupt
+    mock_popen.return_value = events
+
+    result = runner.invoke(cli, ["ls", "--watch"])
+    assert result.exit_code == 0
+    assert result.output.count("=== Containers ===") == 1
+    events.terminate.assert_called_once()
+    events.wait.assert_called_once()
@@ -35,10 +35,13 @@ def _modal_authenticated():
         return False
 
 
-pytestmark = pytest.mark.skipif(
-    not _modal_available() or not _modal_authenticated(),
-    reason="Modal not available or not authenticated (run: modal token set)",
-)
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.skipif(
+        not _modal_available() or not _modal_authenticated(),
+        reason="Modal not available or not authenticated (run: modal token set)",
+    ),
+]
 
 
 # ---------------------------------------------------------------------------
@@ -0,0 +1,52 @@
+"""Tests for the ports command."""
+
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+# Repo root returned by the mocked get_repo_root
+REPO_ROOT = Path("/Users/test/myrepo")
+
+
+@patch("sandbox_cli.run")
+@patch("sandbox_cli.get_repo_root")
+def test_marks_listening_ports_active(mock_repo, mock_run, runner, cli):
+    mock_repo.return_value = REPO_ROOT
+    mock_run.side_effect = [
+        MagicMock(returncode=0, stdout="PATH=/usr/bin\nSANDBOX_PORTS=49152,49153,49154\nHOME=/home/agent\n\n"),
+        MagicMock(returncode=0, stdout=(
+            "LISTEN 0      511          0.0.0.0:49152      0.0.0.0:*\n"
+            "LISTEN 0      4096            [::]:49154         [::]:*\n"
+        )),
+    ]
+
+    result = runner.invoke(cli, ["ports", "test"])
+    assert result.exit_code == 0
+    assert "http://localhost:49152 (active)" in result.output
+    assert "http://localhost:49153\n" in result.output
+    assert "http://localhost:49154 (active)" in result.output
+    # One inspect doubles as the existence check
+    assert mock_run.call_args_list[0].args[0][:2] == ["docker", "inspect"]
+    assert mock_run.call_count == 2
+
+
+@patch("sandbox_cli.run")
+@patch("sandbox_cli.get_repo_root")
+def test_missing_container(mock_repo, mock_run, runner, cli):
+    mock_repo.return_value = REPO_ROOT
+    mock_run.return_value = MagicMock(returncode=1, stdout="")
+
+    result = runner.invoke(cli, ["ports", "test"])
+    assert result.exit_code == 1
+    assert "Sandbox not found: test" in result.output
+    mock_run.assert_called_once()
+
+
+@patch("sandbox_cli.run")
+@patch("sandbox_cli.get_repo_root")
+def test_no_ports_configured(mock_repo, mock_run, runner, cli):
+    mock_repo.return_value = REPO_ROOT
+    mock_run.return_value = MagicMock(returncode=0, stdout="PATH=/usr/bin\n")
+
+    result = runner.invoke(cli, ["ports", "test"])
+    assert result.exit_code == 0
+    assert "No ports configured" in result.output
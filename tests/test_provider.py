@@ -6,7 +6,6 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 import click
-from click.testing import CliRunner
 
 from sandbox_cli import extract_codex_response, extract_gemini_response, get_provider
 
@@ -213,17 +212,6 @@ class TestGetProvider:
 # CLI --provider flag parsing
 # ---------------------------------------------------------------------------
 
-@pytest.fixture
-def runner():
-    return CliRunner()
-
-
-@pytest.fixture
-def cli():
-    from sandbox_cli import cli
-    return cli
-
-
 def test_provider_flag_appears_in_help(runner, cli):
     """AC#19: HELP_TEXT updated to mention --provider flag."""
     result = runner.invoke(cli, ["start", "--help"])
@@ -332,7 +320,7 @@ class TestStateFileProvider:
             if "docker wait" in cmd_str:
                 return MagicMock(returncode=0, stdout="0\n")
             if "docker logs" in cmd_str:
-                return MagicMock(returncode=0, stderr="", stdout='{"type": "result", "result": "done"}\n')
+                return MagicMock(returncode=0, stderr=b"", stdout=b'{"type": "result", "result": "done"}\n')
             if "status" in cmd_str and "--porcelain" in cmd_str:
                 return MagicMock(returncode=0, stderr="", stdout="")
             if "add" in cmd_str and "-A" in cmd_str:
@@ -382,7 +370,7 @@ class TestStateFileProvider:
             if "docker wait" in cmd_str:
                 return MagicMock(returncode=0, stdout="0\n")
             if "docker logs" in cmd_str:
-                return MagicMock(returncode=0, stderr="", stdout='{"type": "result", "result": "done"}\n')
+                return MagicMock(returncode=0, stderr=b"", stdout=b'{"type": "result", "result": "done"}\n')
             if "status" in cmd_str and "--porcelain" in cmd_str:
                 return MagicMock(returncode=0, stderr="", stdout="")
             if "add" in cmd_str and "-A" in cmd_str:
@@ -408,24 +396,14 @@ class TestStateFileProvider:
 class TestReadCommandProvider:
     """AC#13 and AC#14: read command loads provider from state, defaults to claude."""
 
-    @pytest.fixture
-    def runner(self):
-        return CliRunner()
-
-    @pytest.fixture
-    def cli(self):
-        from sandbox_cli import cli
-        return cli
-
     @patch("sandbox_cli.docker_container_rm")
     @patch("sandbox_cli.git_worktree_remove")
-    @patch("sandbox_cli.container_exists")
-    @patch("sandbox_cli.container_running")
+    @patch("sandbox_cli.container_state")
     @patch("sandbox_cli.run")
     @patch("sandbox_cli.get_repo_root")
     @patch("sandbox_cli.get_logs_dir")
     def test_read_defaults_provider_to_claude_when_missing(
-        self, mock_logs_dir, mock_repo, mock_run, mock_running, mock_exists,
+        self, mock_logs_dir, mock_repo, mock_run, mock_state,
         mock_wt_rm, mock_container_rm, runner, cli, tmp_path
     ):
         """AC#13: state file without provider field defaults to claude."""
@@ -433,8 +411,7 @@ class TestReadCommandProvider:
         logs_dir = tmp_path / "logs"
         logs_dir.mkdir()
         mock_logs_dir.return_value = logs_dir
-        mock_exists.return_value = True
-        mock_running.return_value = False
+        mock_state.return_value = (True, False)
         mock_wt_rm.return_value = True
         mock_container_rm.return_value = True
 
@@ -452,7 +429,7 @@ class TestReadCommandProvider:
         def run_side_effect(cmd, **kwargs):
             cmd_str = " ".join(cmd)
             if "docker logs" in cmd_str:
-                return MagicMock(returncode=0, stderr="", stdout='{"type": "result", "result": "done"}\n')
+                return MagicMock(returncode=0, stderr=b"", stdout=b'{"type": "result", "result": "done"}\n')
             if "docker inspect" in cmd_str and "ExitCode" in cmd_str:
                 return MagicMock(returncode=0, stdout="0\n")
             if "status" in cmd_str and "--porcelain" in cmd_str:
@@ -555,7 +532,7 @@ class TestProviderErrorMessage:
             if "docker wait" in cmd_str:
                 return MagicMock(returncode=0, stdout="1\n")  # exit code 1
             if "docker logs" in cmd_str:
-                return MagicMock(returncode=0, stderr="", stdout="")
+                return MagicMock(returncode=0, stderr=b"", stdout=b"")
             if "status" in cmd_str and "--porcelain" in cmd_str:
                 return MagicMock(returncode=0, stderr="", stdout="")
             if "add" in cmd_str:
@@ -802,15 +779,6 @@ class TestGeminiProvider:
 class TestGeminiCLI:
     """AC#3, AC#4, AC#14, AC#15: CLI tests for gemini provider."""
 
-    @pytest.fixture
-    def runner(self):
-        return CliRunner()
-
-    @pytest.fixture
-    def cli(self):
-        from sandbox_cli import cli
-        return cli
-
     def test_gemini_passed_through_to_background(self, runner, cli):
         """AC#1: --provider gemini is passed to run_sandbox_background."""
         with patch("sandbox_cli.get_repo_root", return_value=Path("/tmp/repo")), \
@@ -858,7 +826,7 @@ class TestGeminiCLI:
                 if "docker wait" in cmd_str:
                     return MagicMock(returncode=0, stdout="1\n")
                 if "docker logs" in cmd_str:
-                    return MagicMock(returncode=0, stderr="", stdout="")
+                    return MagicMock(returncode=0, stderr=b"", stdout=b"")
                 if "status" in cmd_str and "--porcelain" in cmd_str:
                     return MagicMock(returncode=0, stderr="", stdout="")
                 if "add" in cmd_str:
@@ -908,7 +876,7 @@ class TestGeminiCLI:
                 if "docker wait" in cmd_str:
                     return MagicMock(returncode=0, stdout="0\n")
                 if "docker logs" in cmd_str:
-                    return MagicMock(returncode=0, stderr="", stdout='{"response": "done"}\n')
+                    return MagicMock(returncode=0, stderr=b"", stdout=b'{"response": "done"}\n')
                 if "status" in cmd_str and "--porcelain" in cmd_str:
                     return MagicMock(returncode=0, stderr="", stdout="")
                 if "add" in cmd_str:
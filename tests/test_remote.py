@@ -84,12 +84,6 @@ def _make_sandbox_mock(object_id="sb-abc123", stdout_chunks=None, returncode=0):
 # Fixtures
 # ---------------------------------------------------------------------------
 
-@pytest.fixture(autouse=True)
-def mock_auth_token():
-    with patch("sandbox_cli.get_auth_token", return_value="test-token"):
-        yield
-
-
 @pytest.fixture(autouse=True)
 def mock_modal_modules(tmp_path):
     """Inject a mock modal module into sys.modules for the duration of each test."""
@@ -520,16 +514,6 @@ class TestNaming:
 # ---------------------------------------------------------------------------
 
 class TestReadModalCommand:
-    @pytest.fixture
-    def runner(self):
-        from click.testing import CliRunner
-        return CliRunner()
-
-    @pytest.fixture
-    def cli(self):
-        from sandbox_cli import cli
-        return cli
-
     def test_read_returns_completed_modal_result(self, runner, cli, tmp_path):
         """read returns stored result without touching Modal when status is absent."""
         from unittest.mock import patch as _patch
@@ -616,16 +600,6 @@ class TestReadModalCommand:
 # ---------------------------------------------------------------------------
 
 class TestStartRemoteFlag:
-    @pytest.fixture
-    def runner(self):
-        from click.testing import CliRunner
-        return CliRunner()
-
-    @pytest.fixture
-    def cli(self):
-        from sandbox_cli import cli
-        return cli
-
     def test_remote_without_task_exits_with_error(self, runner, cli):
         with patch("sandbox_cli.get_repo_root", return_value=Path("/repo/myrepo")):
             result = runner.invoke(cli, ["start", "--remote", "test"])
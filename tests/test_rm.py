@@ -4,20 +4,8 @@ import json
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
-import pytest
-
-
-
-@pytest.fixture
-def runner():
-    from click.testing import CliRunner
-    return CliRunner()
-
-
-@pytest.fixture
-def cli():
-    from sandbox_cli import cli
-    return cli
+# Repo root returned by the mocked get_repo_root
+REPO_ROOT = Path("/Users/test/myrepo")
 
 
 @patch("sandbox_cli.get_repo_root")
@@ -34,7 +22,7 @@ def test_not_in_repo(mock_get_repo, runner, cli):
 @patch("sandbox_cli.git_worktree_remove")
 def test_rm_uses_repo_prefix(mock_wt_rm, mock_container_rm, mock_get_repo,
                                mock_logs_dir, runner, cli, tmp_path):
-    mock_get_repo.return_value = Path("/Users/test/myrepo")
+    mock_get_repo.return_value = REPO_ROOT
     mock_container_rm.return_value = True
     mock_wt_rm.return_value = True
     mock_logs_dir.return_value = tmp_path
@@ -49,7 +37,7 @@ def test_rm_uses_repo_prefix(mock_wt_rm, mock_container_rm, mock_get_repo,
 @patch("sandbox_cli.git_worktree_remove")
 def test_rm_deletes_log_files(mock_wt_rm, mock_container_rm, mock_get_repo,
                                 mock_logs_dir, runner, cli, tmp_path):
-    mock_get_repo.return_value = Path("/Users/test/myrepo")
+    mock_get_repo.return_value = REPO_ROOT
     mock_container_rm.return_value = True
     mock_wt_rm.return_value = True
     mock_logs_dir.return_value = tmp_path
@@ -67,7 +55,7 @@ def test_rm_deletes_log_files(mock_wt_rm, mock_container_rm, mock_get_repo,
 @patch("sandbox_cli.get_repo_root")
 def test_rm_refuses_running_task_without_force(mock_get_repo, mock_logs_dir,
                                                  mock_running, runner, cli, tmp_path):
-    mock_get_repo.return_value = Path("/Users/test/myrepo")
+    mock_get_repo.return_value = REPO_ROOT
     mock_logs_dir.return_value = tmp_path
     mock_running.return_value = True
 
@@ -85,7 +73,7 @@ def test_rm_refuses_running_task_without_force(mock_get_repo, mock_logs_dir,
 @patch("sandbox_cli.git_worktree_remove")
 def test_rm_force_removes_running_task(mock_wt_rm, mock_container_rm, mock_get_repo,
                                          mock_logs_dir, mock_running, runner, cli, tmp_path):
-    mock_get_repo.return_value = Path("/Users/test/myrepo")
+    mock_get_repo.return_value = REPO_ROOT
     mock_logs_dir.return_value = tmp_path
     mock_running.return_value = True
     mock_container_rm.return_value = True
@@ -99,24 +87,24 @@ def test_rm_force_removes_running_task(mock_wt_rm, mock_container_rm, mock_get_r
 
 @patch("sandbox_cli.get_logs_dir")
 @patch("sandbox_cli.get_repo_root")
-@patch("sandbox_cli.docker_container_ls")
-@patch("sandbox_cli.git_worktree_list")
-@patch("sandbox_cli.docker_container_rm")
+@patch("sandbox_cli.docker_container_ls", autospec=True)
+@patch("sandbox_cli.git_worktree_list", autospec=True)
+@patch("sandbox_cli.docker_containers_rm")
 @patch("sandbox_cli.git_worktree_remove")
 @patch("sandbox_cli.run")
 def test_rm_all(mock_run, mock_wt_rm, mock_container_rm, mock_wt_list,
                   mock_container_ls, mock_get_repo, mock_logs_dir, runner, cli, tmp_path):
-    mock_get_repo.return_value = Path("/Users/test/myrepo")
+    mock_get_repo.return_value = REPO_ROOT
     mock_logs_dir.return_value = tmp_path
+    # docker_container_ls filters by prefix on the daemon side
     mock_container_ls.return_value = [
         {"id": "abc", "name": "sandbox-myrepo-test", "status": "Up 2 hours"},
-        {"id": "def", "name": "sandbox-other-foo", "status": "Up 1 hour"},
     ]
     mock_wt_list.return_value = [
         {"path": "/Users/test/myrepo", "branch": "refs/heads/main"},
         {"path": "/Users/test/myrepo__test", "branch": "refs/heads/test"},
     ]
-    mock_container_rm.return_value = True
+    mock_container_rm.return_value = {"sandbox-myrepo-test"}
     mock_wt_rm.return_value = True
     mock_run.return_value = MagicMock(returncode=0)
 
@@ -125,5 +113,30 @@ def test_rm_all(mock_run, mock_wt_rm, mock_container_rm, mock_wt_list,
 
     result = runner.invoke(cli, ["rm", "--all"])
     assert result.exit_code == 0
-    # Should remove repo-matching container
-    mock_container_rm.assert_any_call("sandbox-myrepo-test")
+    # Should remove only repo-matching containers, in a single call
+    mock_container_ls.assert_called_once_with("sandbox-myrepo-")
+    mock_container_rm.assert_called_once_with(["sandbox-myrepo-test"])
+    assert "Removed container: sandbox-myrepo-test" in result.output
+    mock_wt_rm.assert_called_once_with("/Users/test/myrepo__test")
+    assert result.output.index("Removed container") < result.output.index("Removed worktree")
+    # Every worktree removal succeeded, so there is nothing left to prune
+    mock_run.assert_not_called()
+
+
+@patch("sandbox_cli.get_logs_dir")
+@patch("sandbox_cli.get_repo_root")
+@patch("sandbox_cli.docker_container_ls", autospec=True, return_value=[])
+@patch("sandbox_cli.git_worktree_list", autospec=True)
+@patch("sandbox_cli.git_worktree_remove", return_value=False)
+@patch("sandbox_cli.run")
+def test_rm_all_prunes_when_worktree_remove_fails(mock_run, mock_wt_rm, mock_wt_list,
+                                                  mock_container_ls, mock_get_repo, mock_logs_dir,
+                                                  runner, cli, tmp_path):
+    mock_get_repo.return_value = REPO_ROOT
+    mock_logs_dir.return_value = tmp_path
+    mock_wt_list.return_value = [{"path": "/Users/test/myrepo__gone", "branch": "refs/heads/gone"}]
+    mock_run.return_value = MagicMock(returncode=0)
+
+    result = runner.invoke(cli, ["rm", "--all"])
+    assert result.exit_code == 0
+    mock_run.assert_called_once_with(["git", "worktree", "prune"])
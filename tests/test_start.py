@@ -8,18 +8,6 @@ import pytest
 
 
 
-@pytest.fixture
-def runner():
-    from click.testing import CliRunner
-    return CliRunner()
-
-
-@pytest.fixture
-def cli():
-    from sandbox_cli import cli
-    return cli
-
-
 def test_help_shows_task_flags(runner, cli):
     result = runner.invoke(cli, ["start", "--help"])
     assert result.exit_code == 0
@@ -87,25 +75,97 @@ def test_task_file_reads_prompt(mock_repo, mock_git_dir, mock_build, mock_bg, ru
     assert call_kwargs.kwargs.get("task") == "build the thing" or call_kwargs[1].get("task") == "build the thing"
 
 
-@patch("builtins.print")
-@patch("sandbox_cli.container_exists")
+@patch("sandbox_cli.get_auth_token", return_value="token")
+@patch("sandbox_cli.get_gh_token")
+@patch("sandbox_cli.run_sandbox_background")
+@patch("sandbox_cli.build_template_if_exists")
+@patch("sandbox_cli.get_main_git_dir")
+@patch("sandbox_cli.get_repo_root")
+def test_task_prefetches_gh_token(mock_repo, mock_git_dir, mock_build, mock_bg, mock_token, mock_auth,
+                                  runner, cli, tmp_path):
+    mock_repo.return_value = tmp_path
+    mock_git_dir.return_value = tmp_path / ".git"
+    mock_build.return_value = "test-image"
+    mock_bg.return_value = {"container": "sandbox-foo", "name": "foo", "branch": "foo", "exitCode": 0}
+
+    result = runner.invoke(cli, ["start", "foo", "--task", "build it"])
+    assert result.exit_code == 0
+    mock_token.assert_called_once()
+    assert mock_bg.call_args.kwargs["main_git"] == tmp_path / ".git"
+
+    mock_token.reset_mock()
+    result = runner.invoke(cli, ["start", "foo", "--continue"])
+    assert result.exit_code == 0, result.output
+    assert mock_bg.call_args.kwargs["continue_session"] is True
+    mock_token.assert_not_called()
+
+
+@patch("sandbox_cli.run_sandbox")
+@patch("sandbox_cli.build_template_if_exists")
+@patch("sandbox_cli.resolve_context")
+@patch("sandbox_cli.container_state")
+@patch("sandbox_cli.get_worktrees_dir")
+@patch("sandbox_cli.get_repo_root")
+@patch("sandbox_cli.get_auth_token")
+def test_interactive_resume_queries_state_once(mock_auth, mock_repo, mock_wt_dir, mock_state, mock_ctx,
+                                               mock_build, mock_run_sandbox, runner, cli, tmp_path):
+    mock_auth.return_value = "token"
+    mock_repo.return_value = tmp_path / "myrepo"
+    mock_wt_dir.return_value = tmp_path
+    (tmp_path / "myrepo__foo").mkdir()
+    mock_state.return_value = (True, True)
+    mock_ctx.return_value = {"repo_root": tmp_path / "myrepo", "main_git": tmp_path / "myrepo" / ".git",
+                             "has_local": True, "has_remote": False}
+    mock_build.return_value = "img"
+
+    result = runner.invoke(cli, ["start", "foo"])
+    assert result.exit_code == 0, result.output
+    assert "Resuming sandbox: foo" in result.output
+    mock_state.assert_called_once_with("sandbox-myrepo-foo")
+    assert mock_run_sandbox.call_args.kwargs["state"] == (True, True)
+    # Resuming reuses the container, so no image check or build happens here
+    mock_build.assert_not_called()
+
+
+@patch("os.execvp", side_effect=SystemExit)
+@patch("os.fork", return_value=0)  # run the child branch, which execs docker
+@patch("sandbox_cli.container_state")
 @patch("sandbox_cli.ensure_default_image")
 @patch("sandbox_cli.get_gh_token")
 @patch("sandbox_cli.find_available_ports")
 def test_interactive_no_settings_or_sandbox_mount(mock_ports, mock_token, mock_image,
-                                                    mock_container, mock_print):
-    mock_container.return_value = False
+                                                    mock_container, mock_fork, mock_execvp):
+    mock_container.return_value = (False, False)
     mock_image.return_value = "sandbox-cli:default"
     mock_token.return_value = "ghp_test"
     mock_ports.return_value = [49152, 49153, 49154]
 
     from sandbox_cli import run_sandbox
-    run_sandbox(
-        "test", "myrepo",
-        Path("/tmp/.git"), Path("/tmp/myrepo__test"),
-        template="sandbox-cli:default",
-    )
-
-    printed = " ".join(str(c) for c in mock_print.call_args_list)
-    assert "--settings" not in printed
-    assert "/opt/sandbox-claude" not in printed
+    with pytest.raises(SystemExit):
+        run_sandbox(
+            "test", "myrepo",
+            Path("/tmp/.git"), Path("/tmp/myrepo__test"),
+            template="sandbox-cli:default",
+        )
+
+    file, argv = mock_execvp.call_args.args
+    assert argv[:2] == ["docker", "run"]
+    assert "--settings" not in argv
+    assert not any("/opt/sandbox-claude" in arg for arg in argv)
+
+
+@patch("sandbox_cli.run")
+@patch("sandbox_cli.container_state")
+def test_interactive_stopped_container_start_failure_exits(mock_state, mock_run):
+    mock_state.return_value = (True, False)
+    mock_run.return_value = MagicMock(returncode=1, stderr="no such container\n")
+
+    from sandbox_cli import run_sandbox
+    with patch("os.fork") as mock_fork, pytest.raises(SystemExit):
+        run_sandbox(
+            "test", "myrepo",
+            Path("/tmp/.git"), Path("/tmp/myrepo__test"),
+            template="sandbox-cli:default",
+        )
+    mock_run.assert_called_once_with(["docker", "start", "sandbox-myrepo-test"])
+    mock_fork.assert_not_called()
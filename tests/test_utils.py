@@ -1,9 +1,12 @@
 """Tests for utility functions."""
 
 import fcntl
+import re
+import subprocess
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 
+import pytest
 
 from sandbox_cli import (
     safe_name,
@@ -11,7 +14,10 @@ from sandbox_cli import (
     get_repo_root,
     get_main_git_dir,
     docker_container_ls,
+    container_state,
     git_worktree_list,
+    ref_exists,
+    is_ref_name,
     extract_response,
     parse_diff_stats,
     build_lock,
@@ -20,77 +26,105 @@ from sandbox_cli import (
 
 
 class TestSafeName:
-    def test_simple_name(self):
-        assert safe_name("feature") == "feature"
-
-    def test_with_slashes(self):
-        assert safe_name("feature/auth") == "feature-auth"
-
-    def test_multiple_slashes(self):
-        assert safe_name("claude/integrate/api") == "claude-integrate-api"
-
-    def test_no_slashes(self):
-        assert safe_name("fix-bug-123") == "fix-bug-123"
+    @pytest.mark.parametrize("name,expected", [
+        ("feature", "feature"),
+        ("feature/auth", "feature-auth"),
+        ("claude/integrate/api", "claude-integrate-api"),
+        ("fix-bug-123", "fix-bug-123"),
+    ])
+    def test_safe_name(self, name, expected):
+        assert safe_name(name) == expected
 
 
 class TestGetWorktreePath:
-    def test_basic_path(self):
-        repo_root = Path("/Users/test/projects/myrepo")
-        result = get_worktree_path(repo_root, "feature-auth")
-        expected = Path.home() / ".config" / "sandbox-cli" / "worktrees" / "myrepo__feature-auth"
-        assert result == expected
-
-    def test_nested_repo(self):
-        repo_root = Path("/Users/test/deep/nested/repo")
-        result = get_worktree_path(repo_root, "task")
-        expected = Path.home() / ".config" / "sandbox-cli" / "worktrees" / "repo__task"
-        assert result == expected
+    @pytest.mark.parametrize("repo_root,name,expected", [
+        ("/Users/test/projects/myrepo", "feature-auth", "myrepo__feature-auth"),
+        ("/Users/test/deep/nested/repo", "task", "repo__task"),
+    ])
+    def test_path(self, repo_root, name, expected):
+        result = get_worktree_path(Path(repo_root), name)
+        assert result == Path.home() / ".config" / "sandbox-cli" / "worktrees" / expected
 
 
 class TestGetRepoRoot:
     @patch("sandbox_cli.run")
     def test_in_repo(self, mock_run):
-        mock_run.side_effect = [
-            MagicMock(returncode=0, stdout="/Users/test/myrepo\n"),  # --show-toplevel
-            MagicMock(returncode=0, stdout=".git\n"),                 # --git-common-dir
-        ]
+        # --show-toplevel, --git-common-dir
+        mock_run.return_value = subprocess.CompletedProcess([], 0, stdout="/Users/test/myrepo\n.git\n")
         assert get_repo_root() == Path("/Users/test/myrepo")
 
     @patch("sandbox_cli.run")
     def test_not_in_repo(self, mock_run):
-        mock_run.return_value = MagicMock(returncode=128, stdout="")
+        mock_run.return_value = subprocess.CompletedProcess([], 128, stdout="")
         assert get_repo_root() is None
 
     @patch("sandbox_cli.run")
     def test_in_worktree_returns_main_repo(self, mock_run):
         """When inside a worktree like myrepo__feature, should return main repo root."""
         from sandbox_cli import get_repo_root
-        mock_run.side_effect = [
-            MagicMock(returncode=0, stdout="/Users/test/myrepo__feature\n"),  # rev-parse --show-toplevel
-            MagicMock(returncode=0, stdout="/Users/test/myrepo/.git\n"),       # rev-parse --git-common-dir
-        ]
+        mock_run.return_value = subprocess.CompletedProcess(
+            [], 0,
+            stdout="/Users/test/myrepo__feature\n/Users/test/myrepo/.git\n"
+        )
         result = get_repo_root()
         assert result == Path("/Users/test/myrepo")
 
+    @patch("sandbox_cli.run")
+    def test_in_subdirectory(self, mock_run, tmp_path, monkeypatch):
+        """A relative --git-common-dir is resolved against the cwd."""
+        subdir = tmp_path / "src" / "pkg"
+        subdir.mkdir(parents=True)
+        monkeypatch.chdir(subdir)
+        mock_run.return_value = subprocess.CompletedProcess([], 0, stdout=f"{tmp_path}\n../../.git\n")
+        assert get_repo_root() == tmp_path
+
+    @patch("sandbox_cli.run")
+    def test_memoized(self, mock_run):
+        mock_run.return_value = subprocess.CompletedProcess([], 0, stdout="/Users/test/myrepo\n.git\n")
+        assert get_repo_root() == get_repo_root() == Path("/Users/test/myrepo")
+        mock_run.assert_called_once()
+
+
+class TestResolveContext:
+    @patch("sandbox_cli.remote_branch_exists")
+    @patch("sandbox_cli.branch_exists")
+    @patch("sandbox_cli.run")
+    def test_local_branch(self, mock_run, mock_branch, mock_remote):
+        from sandbox_cli import resolve_context
+        mock_run.return_value = subprocess.CompletedProcess([], 0, stdout="/Users/test/myrepo\n.git\n")
+        mock_branch.return_value = True
+        ctx = resolve_context("feature")
+        assert ctx["repo_root"] == Path("/Users/test/myrepo")
+        assert ctx["main_git"] == Path("/Users/test/myrepo/.git")
+        assert ctx["has_local"] is True
+        assert ctx["has_remote"] is False
+        mock_remote.assert_not_called()
+
+    @patch("sandbox_cli.run")
+    def test_not_in_repo(self, mock_run):
+        from sandbox_cli import resolve_context
+        mock_run.return_value = subprocess.CompletedProcess([], 128, stdout="")
+        assert resolve_context("feature") is None
+
 
 class TestGetMainGitDir:
     @patch("sandbox_cli.run")
     def test_in_main_repo(self, mock_run):
-        mock_run.return_value = MagicMock(returncode=0, stdout=".git\n")
+        mock_run.return_value = subprocess.CompletedProcess([], 0, stdout=".git\n")
         assert get_main_git_dir(Path("/Users/test/myrepo")) == Path("/Users/test/myrepo/.git")
 
     @patch("sandbox_cli.run")
     def test_in_worktree(self, mock_run):
-        mock_run.return_value = MagicMock(returncode=0, stdout="/Users/test/myrepo/.git\n")
+        mock_run.return_value = subprocess.CompletedProcess([], 0, stdout="/Users/test/myrepo/.git\n")
         assert get_main_git_dir(Path("/Users/test/myrepo__feature")) == Path("/Users/test/myrepo/.git")
 
 
 class TestDockerContainerLs:
     @patch("sandbox_cli.run")
     def test_parses_output(self, mock_run):
-        mock_run.return_value = MagicMock(
-            returncode=0,
-            stdout="abc123\tsandbox-test\tUp 2 hours\ndef456\tsandbox-other\tExited (0) 1 hour ago"
+        mock_run.return_value = subprocess.CompletedProcess(
+            [], 0,
+            stdout=b"abc123\tsandbox-test\tUp 2 hours\ndef456\tsandbox-other\tExited (0) 1 hour ago"
         )
         result = docker_container_ls()
         assert len(result) == 2
@@ -99,30 +133,339 @@ class TestDockerContainerLs:
 
     @patch("sandbox_cli.run")
     def test_empty_output(self, mock_run):
-        mock_run.return_value = MagicMock(returncode=0, stdout="")
+        mock_run.return_value = subprocess.CompletedProcess([], 0, stdout=b"")
         assert docker_container_ls() == []
 
+    @patch("sandbox_cli.run")
+    def test_prefix_filter_is_anchored(self, mock_run):
+        mock_run.return_value = subprocess.CompletedProcess([], 0, stdout=b"")
+        docker_container_ls("sandbox-my.repo-")
+        cmd = mock_run.call_args.args[0]
+        pattern = cmd[cmd.index("--filter") + 1].removeprefix("name=")
+        assert re.search(pattern, "sandbox-my.repo-test")
+        assert re.search(pattern, "/sandbox-my.repo-test")
+        assert not re.search(pattern, "sandbox-myXrepo-test")
+        assert not re.search(pattern, "old-sandbox-my.repo-test")
+
     @patch("sandbox_cli.run")
     def test_command_fails(self, mock_run):
-        mock_run.return_value = MagicMock(returncode=1, stdout="")
+        mock_run.return_value = subprocess.CompletedProcess([], 1, stdout=b"")
         assert docker_container_ls() == []
 
 
+class TestApplyContainerEvent:
+    def test_status_change(self):
+        from sandbox_cli import apply_container_event
+        containers = [{"id": "abc", "name": "sandbox-r-a", "status": "Up 2 hours"}]
+        assert apply_container_event(containers, "die", "sandbox-r-a")
+        assert containers[0]["status"] == "Exited"
+
+    def test_create_and_destroy(self):
+        from sandbox_cli import apply_container_event
+        containers = []
+        assert apply_container_event(containers, "create", "sandbox-r-a", "0123456789abcdef")
+        assert containers == [{"id": "0123456789ab", "name": "sandbox-r-a", "status": "Created"}]
+        assert apply_container_event(containers, "destroy", "sandbox-r-a")
+        assert containers == []
+
+    def test_ignores_unrelated_actions(self):
+        from sandbox_cli import apply_container_event
+        containers = [{"id": "abc", "name": "sandbox-r-a", "status": "Up"}]
+        assert not apply_container_event(containers, "exec_start: bash", "sandbox-r-a")
+        assert not apply_container_event(containers, "start", "sandbox-r-a")
+        assert not apply_container_event(containers, "die", "sandbox-r-missing")
+
+
+class TestDockerContainersRm:
+    @patch("sandbox_cli.run")
+    def test_single_call_for_all_names(self, mock_run):
+        from sandbox_cli import docker_containers_rm
+        mock_run.return_value = subprocess.CompletedProcess([], 1, stdout="sandbox-a\n")
+        assert docker_containers_rm(["sandbox-a", "sandbox-b"]) == {"sandbox-a"}
+        mock_run.assert_called_once_with(["docker", "rm", "-f", "sandbox-a", "sandbox-b"])
+
+    @patch("sandbox_cli.run")
+    def test_no_names_skips_docker(self, mock_run):
+        from sandbox_cli import docker_containers_rm
+        assert docker_containers_rm([]) == set()
+        mock_run.assert_not_called()
+
+
+class TestContainerState:
+    @patch("sandbox_cli.run")
+    def test_running(self, mock_run):
+        mock_run.return_value = subprocess.CompletedProcess([], 0, stdout="running\n")
+        assert container_state("sandbox-myrepo-test") == (True, True)
+        filter_arg = mock_run.call_args[0][0][4]
+        assert filter_arg == "name=^/?sandbox\\-myrepo\\-test$"
+
+    @patch("sandbox_cli.run")
+    def test_stopped(self, mock_run):
+        mock_run.return_value = subprocess.CompletedProcess([], 0, stdout="exited\n")
+        assert container_state("sandbox-myrepo-test") == (True, False)
+
+    @patch("sandbox_cli.run")
+    def test_missing(self, mock_run):
+        mock_run.return_value = subprocess.CompletedProcess([], 0, stdout="")
+        assert container_state("sandbox-myrepo-test") == (False, False)
+
+    @patch("sandbox_cli.run")
+    def test_command_fails(self, mock_run):
+        mock_run.return_value = subprocess.CompletedProcess([], 1, stdout="")
+        assert container_state("sandbox-myrepo-test") == (False, False)
+
+
+class TestRun:
+    def test_uncaptured_output_goes_to_stderr(self, capfd):
+        from sandbox_cli import run
+        assert run(["echo", "building"], capture=False).returncode == 0
+        out, err = capfd.readouterr()
+        assert out == ""
+        assert err == "building\n"
+
+
+class TestRunCheck:
+    def test_exit_status(self):
+        from sandbox_cli import run_check
+        assert run_check(["true"]) is True
+        assert run_check(["false"]) is False
+
+
+class TestFindAvailablePorts:
+    def test_skips_port_in_use(self):
+        import socket
+        from sandbox_cli import find_available_ports
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.bind(("", 0))
+            s.listen()
+            busy = s.getsockname()[1]
+            ports = find_available_ports(2, start=busy, end=min(busy + 100, 65536))
+        assert len(ports) == 2
+        assert busy not in ports
+
+    def test_exhausted_range_returns_what_it_found(self):
+        import socket
+        from sandbox_cli import find_available_ports
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.bind(("", 0))
+            s.listen()
+            busy = s.getsockname()[1]
+            assert find_available_ports(3, start=busy, end=busy + 1) == []
+
+
+class TestCopyEnvFiles:
+    def test_copies_env_files_with_mode(self, tmp_path):
+        from sandbox_cli import copy_env_files
+        src, dest = tmp_path / "src", tmp_path / "dest"
+        src.mkdir()
+        dest.mkdir()
+        (src / ".env").write_text("A=1")
+        (src / ".env").chmod(0o600)
+        (src / ".env.local").write_text("B=2")
+        (src / ".envrc.d").mkdir()
+        (src / "other").write_text("x")
+        (tmp_path / "shared.env").write_text("C=3")
+        (src / ".env.shared").symlink_to(tmp_path / "shared.env")
+
+        assert sorted(copy_env_files(src, dest)) == [".env", ".env.local", ".env.shared"]
+        assert (dest / ".env.shared").read_text() == "C=3"
+        assert (dest / ".env").read_text() == "A=1"
+        assert (dest / ".env").stat().st_mode & 0o777 == 0o600
+        assert not (dest / ".envrc.d").exists()
+
+
+class TestRefExists:
+    def test_existing_and_missing_refs(self, tmp_path, monkeypatch):
+        subprocess.run(["git", "init", "-q", "-b", "main", str(tmp_path)], check=True)
+        subprocess.run(
+            ["git", "-C", str(tmp_path), "-c", "user.name=t", "-c", "user.email=t@t",
+             "commit", "-q", "--allow-empty", "-m", "init"],
+            check=True,
+        )
+        monkeypatch.chdir(tmp_path)
+        assert ref_exists("refs/heads/main")
+        assert not ref_exists("refs/heads/missing")
+        # Second lookup reuses the same process
+        assert ref_exists("refs/heads/main")
+
+    def test_outside_repo(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("GIT_CEILING_DIRECTORIES", str(tmp_path.parent))
+        assert not ref_exists("refs/heads/main")
+
+    def test_rejects_revision_expressions(self, tmp_path, monkeypatch):
+        subprocess.run(["git", "init", "-q", "-b", "main", str(tmp_path)], check=True)
+        (tmp_path / "README").write_text("hi")
+        subprocess.run(["git", "-C", str(tmp_path), "add", "README"], check=True)
+        subprocess.run(
+            ["git", "-C", str(tmp_path), "-c", "user.name=t", "-c", "user.email=t@t",
+             "commit", "-q", "-m", "init"],
+            check=True,
+        )
+        monkeypatch.chdir(tmp_path)
+        # cat-file alone would resolve each of these
+        for ref in ["refs/heads/main~0", "refs/heads/main^", "refs/heads/main:README", "refs/heads/main@{0}"]:
+            assert not ref_exists(ref), ref
+        assert ref_exists("refs/heads/main")
+
+
+@pytest.mark.parametrize("ref,valid", [
+    ("refs/heads/main", True),
+    ("refs/heads/feature/x-1", True),
+    ("refs/remotes/origin/fix.y", True),
+    ("main", False),
+    ("refs/heads/a..b", False),
+    ("refs/heads/a b", False),
+    ("refs/heads/a~1", False),
+    ("refs/heads/a^", False),
+    ("refs/heads/a:b", False),
+    ("refs/heads/a?", False),
+    ("refs/heads/a*", False),
+    ("refs/heads/a[1]", False),
+    ("refs/heads/a\\b", False),
+    ("refs/heads/a@{1}", False),
+    ("refs/heads/a\tb", False),
+    ("refs/heads//a", False),
+    ("refs/heads/a/", False),
+    ("refs/heads/a.", False),
+    ("refs/heads/.a", False),
+    ("refs/heads/a.lock", False),
+])
+def test_is_ref_name(ref, valid):
+    assert is_ref_name(ref) is valid
+
+
+class TestFetchIfStale:
+    @patch("sandbox_cli.run")
+    def test_skips_recent_fetch(self, mock_run, tmp_path):
+        from sandbox_cli import fetch_if_stale
+        (tmp_path / "FETCH_HEAD").write_text("")
+        assert fetch_if_stale(tmp_path) is False
+        mock_run.assert_not_called()
+
+    @patch("sandbox_cli.run")
+    def test_fetches_when_stale(self, mock_run, tmp_path):
+        import os
+        from sandbox_cli import fetch_if_stale
+        fetch_head = tmp_path / "FETCH_HEAD"
+        fetch_head.write_text("")
+        os.utime(fetch_head, (0, 0))
+        assert fetch_if_stale(tmp_path) is True
+        mock_run.assert_called_once_with(["git", "fetch", "--quiet"])
+
+    @patch("sandbox_cli.run")
+    def test_fetches_when_never_fetched(self, mock_run, tmp_path):
+        from sandbox_cli import fetch_if_stale
+        assert fetch_if_stale(tmp_path) is True
+
+    @patch("sandbox_cli.run")
+    def test_skips_recent_fetch_from_linked_worktree(self, mock_run, tmp_path):
+        import os
+        from sandbox_cli import fetch_if_stale
+        (tmp_path / "FETCH_HEAD").write_text("")
+        os.utime(tmp_path / "FETCH_HEAD", (0, 0))
+        (tmp_path / "worktrees" / "myrepo__feature").mkdir(parents=True)
+        (tmp_path / "worktrees" / "myrepo__feature" / "FETCH_HEAD").write_text("")
+        assert fetch_if_stale(tmp_path) is False
+        mock_run.assert_not_called()
+
+
+class TestGetGhToken:
+    @pytest.fixture(autouse=True)
+    def no_token_env(self, monkeypatch):
+        for var in ("GITHUB_TOKEN", "GH_ENTERPRISE_TOKEN", "GITHUB_ENTERPRISE_TOKEN"):
+            monkeypatch.delenv(var, raising=False)
+
+    @patch("sandbox_cli.run")
+    def test_env_var_skips_gh_cli(self, mock_run, monkeypatch):
+        from sandbox_cli import get_gh_token
+        monkeypatch.setenv("GH_TOKEN", "ghp_env")
+        assert get_gh_token() == "ghp_env"
+        mock_run.assert_not_called()
+
+    @pytest.mark.parametrize("host,env,expected", [
+        (None, {"GITHUB_TOKEN": "ghp_github"}, "ghp_github"),
+        (None, {"GH_TOKEN": "ghp_gh", "GITHUB_TOKEN": "ghp_github"}, "ghp_gh"),
+        ("acme.ghe.com", {"GITHUB_TOKEN": "ghp_github"}, "ghp_github"),
+        ("ghe.example.com", {"GH_ENTERPRISE_TOKEN": "ghp_ent"}, "ghp_ent"),
+        ("ghe.example.com", {"GITHUB_ENTERPRISE_TOKEN": "ghp_ent2"}, "ghp_ent2"),
+        ("ghe.example.com", {"GITHUB_TOKEN": "ghp_github"}, "gho_stored"),
+    ])
+    @patch("sandbox_cli.run")
+    def test_env_tokens_take_precedence_over_hosts_yml(self, mock_run, host, env, expected, monkeypatch, tmp_path):
+        from sandbox_cli import get_gh_token
+        monkeypatch.delenv("GH_TOKEN", raising=False)
+        if host:
+            monkeypatch.setenv("GH_HOST", host)
+        else:
+            monkeypatch.delenv("GH_HOST", raising=False)
+        for var, value in env.items():
+            monkeypatch.setenv(var, value)
+        monkeypatch.setenv("GH_CONFIG_DIR", str(tmp_path))
+        (tmp_path / "hosts.yml").write_text(
+            f"{host or 'github.com'}:\n    oauth_token: gho_stored\n    user: octocat\n"
+        )
+        assert get_gh_token() == expected
+        mock_run.assert_not_called()
+
+    @patch("sandbox_cli.run")
+    def test_gh_cli_called_once(self, mock_run, monkeypatch, tmp_path):
+        from sandbox_cli import get_gh_token
+        monkeypatch.delenv("GH_TOKEN", raising=False)
+        monkeypatch.setenv("GH_CONFIG_DIR", str(tmp_path))
+        mock_run.return_value = subprocess.CompletedProcess([], 0, stdout="ghp_cli\n")
+        assert get_gh_token() == "ghp_cli"
+        assert get_gh_token() == "ghp_cli"
+        mock_run.assert_called_once_with(["gh", "auth", "token"])
+
+    @patch("sandbox_cli.run")
+    def test_reads_hosts_yml_without_gh_cli(self, mock_run, monkeypatch, tmp_path):
+        from sandbox_cli import get_gh_token
+        monkeypatch.delenv("GH_TOKEN", raising=False)
+        monkeypatch.delenv("GH_HOST", raising=False)
+        monkeypatch.setenv("GH_CONFIG_DIR", str(tmp_path))
+        (tmp_path / "hosts.yml").write_text(
+            "ghe.example.com:\n"
+            "    oauth_token: gho_enterprise\n"
+            "github.com:\n"
+            "    users:\n"
+            "        octocat:\n"
+            "            oauth_token: gho_user\n"
+            "    git_protocol: https\n"
+            "    oauth_token: gho_active\n"
+            "    user: octocat\n"
+        )
+        assert get_gh_token() == "gho_active"
+        mock_run.assert_not_called()
+
+    @patch("sandbox_cli.run")
+    def test_keyring_hosts_yml_falls_back_to_gh_cli(self, mock_run, monkeypatch, tmp_path):
+        from sandbox_cli import get_gh_token
+        monkeypatch.delenv("GH_TOKEN", raising=False)
+        monkeypatch.delenv("GH_HOST", raising=False)
+        monkeypatch.setenv("GH_CONFIG_DIR", str(tmp_path))
+        (tmp_path / "hosts.yml").write_text("github.com:\n    git_protocol: https\n    user: octocat\n")
+        mock_run.return_value = subprocess.CompletedProcess([], 0, stdout="gho_keyring\n")
+        assert get_gh_token() == "gho_keyring"
+
+
 class TestGitWorktreeList:
     @patch("sandbox_cli.run")
     def test_parses_output(self, mock_run):
-        mock_run.return_value = MagicMock(
-            returncode=0,
-            stdout="worktree /Users/test/repo\nHEAD abc123\nbranch refs/heads/main\n\nworktree /Users/test/repo__feature\nHEAD def456\nbranch refs/heads/feature/auth"
+        mock_run.return_value = subprocess.CompletedProcess(
+            [], 0,
+            stdout=b"worktree /Users/test/repo\nHEAD abc123\nbranch refs/heads/main\n\nworktree /Users/test/repo__feature\nHEAD def456\nbranch refs/heads/feature/auth"
         )
         result = git_worktree_list()
         assert len(result) == 2
         assert result[0]["path"] == "/Users/test/repo"
         assert result[1]["path"] == "/Users/test/repo__feature"
+        assert result[1]["branch"] == "refs/heads/feature/auth"
+        assert result[1]["head"] == "def456"
 
     @patch("sandbox_cli.run")
     def test_empty_output(self, mock_run):
-        mock_run.return_value = MagicMock(returncode=0, stdout="")
+        mock_run.return_value = subprocess.CompletedProcess([], 0, stdout=b"")
         assert git_worktree_list() == []
 
 